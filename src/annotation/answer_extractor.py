@@ -1,11 +1,17 @@
-from transformers import pipeline
-from src.config import QA_MODEL
+from src.config import QA_MODEL, QA_BATCH_SIZE, INFERENCE_BACKEND
+from src.annotation import backends
 
 class AnswerExtractor:
-    def __init__(self):
+    def __init__(self, backend=INFERENCE_BACKEND):
+        # imported here so importing the pipeline doesn't pull in transformers/torch
+        from transformers import pipeline
+
+        self.backend = backends.resolve(backend)
+        tokenizer, model = backends.load_qa_model(QA_MODEL, self.backend)
         self.qa_pipeline = pipeline(
             "question-answering",
-            model=QA_MODEL
+            model=model,
+            tokenizer=tokenizer
         )
 
     def extract(self, question, context):
@@ -14,3 +20,23 @@ class AnswerExtractor:
             context=context
         )
         return result["answer"], result["score"]
+
+    def extract_batch(self, questions, contexts, batch_size=QA_BATCH_SIZE):
+        """
+        Answers many (question, context) pairs through the QA pipeline in batches.
+        Returns a list of (answer, score) tuples in input order.
+        """
+        if not questions:
+            return []
+
+        results = self.qa_pipeline(
+            question=list(questions),
+            context=list(contexts),
+            batch_size=batch_size
+        )
+
+        # the pipeline unwraps single-item inputs into a plain dict
+        if isinstance(results, dict):
+            results = [results]
+
+        return [(r["answer"], r["score"]) for r in results]
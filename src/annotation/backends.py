@@ -0,0 +1,93 @@
+"""
+backends.py
+-----------
+Loads the QG and QA models for an inference backend (INFERENCE_BACKEND):
+
+    "torch"       PyTorch, full precision
+    "torch-int8"  PyTorch with dynamic int8 quantization of the Linear layers
+    "onnx"        ONNX Runtime through optimum (needs `pip install optimum[onnxruntime]`)
+
+Every backend returns a (tokenizer, model) pair that supports `generate()`
+(QG) or plugs into the transformers QA pipeline, so QuestionGenerator and
+AnswerExtractor don't care which one they got.
+"""
+
+import os
+
+from src.config import ONNX_MODEL_DIR
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def onnx_available():
+    try:
+        import onnxruntime  # noqa: F401
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve(backend):
+    """Returns the backend that will actually be used for `backend`."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "onnx" and not onnx_available():
+        print("[WARN] ONNX Runtime / optimum not installed, falling back to the torch backend")
+        return "torch"
+    return backend
+
+
+def _quantize(model):
+    import torch
+
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_class, model_name):
+    """Loads an exported ONNX model, exporting it on first use."""
+    export_dir = os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+    if os.path.isdir(export_dir):
+        return model_class.from_pretrained(export_dir)
+
+    print(f"[INFO] Exporting {model_name} to ONNX (one-time)...")
+    model = model_class.from_pretrained(model_name, export=True)
+    model.save_pretrained(export_dir)
+    return model
+
+
+def load_qg_tokenizer(model_name):
+    from transformers import T5Tokenizer
+
+    return T5Tokenizer.from_pretrained(model_name)
+
+
+def load_qg_model(model_name, backend):
+    tokenizer = load_qg_tokenizer(model_name)
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        return tokenizer, _load_onnx(ORTModelForSeq2SeqLM, model_name)
+
+    from transformers import T5ForConditionalGeneration
+    model = T5ForConditionalGeneration.from_pretrained(model_name)
+    if backend == "torch-int8":
+        model = _quantize(model)
+    return tokenizer, model
+
+
+def load_qa_model(model_name, backend):
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForQuestionAnswering
+        return tokenizer, _load_onnx(ORTModelForQuestionAnswering, model_name)
+
+    from transformers import AutoModelForQuestionAnswering
+    model = AutoModelForQuestionAnswering.from_pretrained(model_name)
+    if backend == "torch-int8":
+        model = _quantize(model)
+    return tokenizer, model
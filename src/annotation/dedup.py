@@ -0,0 +1,133 @@
+"""
+dedup.py
+--------
+Near-duplicate detection for chunks and QA pairs.
+
+Scanned manuals repeat headers, boilerplate warnings and whole pages.
+ChunkIndex keeps a MinHash signature of every chunk seen so far and uses
+LSH banding to find earlier chunks whose word-shingle Jaccard similarity is
+at least DEDUP_CHUNK_THRESHOLD, so QAPipeline can skip QG/QA for them.
+QADeduplicator collapses QA pairs that only differ in case, punctuation or
+whitespace.
+"""
+
+import hashlib
+import random
+import re
+import struct
+
+from src.config import (
+    DEDUP_CHUNK_THRESHOLD,
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_NUM_PERM,
+    DEDUP_LSH_BANDS
+)
+
+_WORD = re.compile(r"\w+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize(text):
+    """Lowercase words only; used to compare questions and answers."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def _shingles(text, size):
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(shingle):
+    return struct.unpack("<I", hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest())[0]
+
+
+class ChunkIndex:
+    def __init__(self, threshold=DEDUP_CHUNK_THRESHOLD, shingle_size=DEDUP_SHINGLE_SIZE,
+                 num_perm=DEDUP_NUM_PERM, bands=DEDUP_LSH_BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.rows = num_perm // bands
+
+        # fixed seed so signatures are comparable across runs
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+
+    def signature(self, text):
+        hashes = [_hash32(s) for s in _shingles(text, self.shingle_size)]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+    def _bands(self, signature):
+        for band, start in enumerate(range(0, self.num_perm, self.rows)):
+            yield band, signature[start:start + self.rows]
+
+    def similarity(self, sig_a, sig_b):
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / self.num_perm
+
+    def find(self, signature):
+        """Returns the id of an indexed chunk at least `threshold` similar, or None."""
+        candidates = set()
+        for band, key in self._bands(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        for candidate in sorted(candidates):
+            if self.similarity(signature, self._signatures[candidate]) >= self.threshold:
+                return candidate
+        return None
+
+    def add(self, signature):
+        chunk_id = len(self._signatures)
+        self._signatures.append(signature)
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, []).append(chunk_id)
+        return chunk_id
+
+    def is_duplicate(self, text):
+        """Indexes `text` unless a near-duplicate is already indexed. Returns True if it was."""
+        signature = self.signature(text)
+        if self.find(signature) is not None:
+            return True
+        self.add(signature)
+        return False
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+class QADeduplicator:
+    """Drops QA pairs whose normalized question and answer were already kept."""
+
+    def __init__(self):
+        self._seen = set()
+
+    @staticmethod
+    def key(record):
+        return normalize(record["question"]), normalize(record["answer"])
+
+    def add(self, record):
+        """Returns True if the record is new (and remembers it)."""
+        key = self.key(record)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def seed(self, keys):
+        """Remembers already-kept pairs by their `key`, e.g. from a resumed run."""
+        self._seen.update(keys)
+
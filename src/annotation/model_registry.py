@@ -0,0 +1,72 @@
+"""
+model_registry.py
+-----------------
+Process-wide home for the QG and QA models. Models are loaded on first use
+and shared by every QAPipeline in the process, so repeated runs (e.g. each
+dashboard click) don't reload weights from disk.
+
+Models are kept per inference backend, so e.g. the fp32 and int8 variants
+can be loaded side by side for a comparison.
+"""
+
+import gc
+import threading
+
+from src.annotation.question_generator import QuestionGenerator
+from src.annotation.answer_extractor import AnswerExtractor
+from src.config import INFERENCE_BACKEND
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _get(key, backend, factory):
+    with _lock:
+        if (key, backend) not in _models:
+            _models[(key, backend)] = factory(backend=backend)
+        return _models[(key, backend)]
+
+
+def get_question_generator(backend=INFERENCE_BACKEND):
+    return _get("question_generator", backend, QuestionGenerator)
+
+
+def get_answer_extractor(backend=INFERENCE_BACKEND):
+    return _get("answer_extractor", backend, AnswerExtractor)
+
+
+def register(key, model, backend=INFERENCE_BACKEND):
+    """Install a ready-made model (e.g. a stub for benchmarks) under `key`."""
+    with _lock:
+        _models[(key, backend)] = model
+
+
+def warm_up(backend=INFERENCE_BACKEND):
+    """Load every model now instead of on the first request."""
+    get_question_generator(backend)
+    get_answer_extractor(backend)
+
+
+def loaded_models():
+    with _lock:
+        return list(_models)
+
+
+def unload(key=None, backend=None):
+    """
+    Drop models and free their memory: all of them by default, or only those
+    matching `key` and/or `backend`.
+    """
+    with _lock:
+        for model_key, model_backend in list(_models):
+            if key not in (None, model_key) or backend not in (None, model_backend):
+                continue
+            del _models[(model_key, model_backend)]
+
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
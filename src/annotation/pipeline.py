@@ -1,14 +1,15 @@
 import os
+import re
 from src.annotation.qa_pipeline import QAPipeline
 
 def run_annotation_and_qa(cleaned_json_path):
     """
-    Takes cleaned OCR JSON and produces:
+    Takes cleaned OCR JSON/JSONL and produces:
     1. Annotated JSON
-    2. QA dataset JSON
+    2. QA dataset JSONL
     """
 
-    base_name = os.path.basename(cleaned_json_path).replace("_cleaned.json", "")
+    base_name = re.sub(r"_cleaned\.jsonl?(\.gz|\.zst)?$", "", os.path.basename(cleaned_json_path))
 
     # -----------------------------
     # Ensure folders
@@ -18,7 +19,7 @@ def run_annotation_and_qa(cleaned_json_path):
     # -----------------------------
     # Step 4: QA Generation
     # -----------------------------
-    qa_output_path = f"data/final/{base_name}_qa.json"
+    qa_output_path = f"data/final/{base_name}_qa.jsonl"
 
     qa_pipeline = QAPipeline()
     qa_pipeline.process(
@@ -28,4 +29,19 @@ def run_annotation_and_qa(cleaned_json_path):
 
     return {
         "qa": qa_output_path
-    }
\ No newline at end of file
+    }
+
+def run_annotation_and_qa_on_pages(pages, base_name="combined"):
+    """
+    Same as run_annotation_and_qa, but consumes cleaned pages from any
+    iterable (e.g. a queue fed by ingestion) instead of a file.
+    """
+    os.makedirs("data/final", exist_ok=True)
+    qa_output_path = f"data/final/{base_name}_qa.jsonl"
+
+    qa_pipeline = QAPipeline()
+    qa_pipeline.process_pages(pages, output_path=qa_output_path)
+
+    return {
+        "qa": qa_output_path
+    }
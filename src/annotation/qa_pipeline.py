@@ -1,46 +1,412 @@
+import os
 import json
+import time
+import hashlib
+from collections import namedtuple
+from itertools import islice
 from tqdm import tqdm
 
+from src import metrics
+from src.cache import get_cache
+from src.record_io import iter_records, write_records
 from src.annotation.text_chunker import chunk_text
-from src.annotation.question_generator import QuestionGenerator
-from src.annotation.answer_extractor import AnswerExtractor
-from src.config import MIN_ANSWER_SCORE, MIN_ANSWER_LENGTH
+from src.annotation import model_registry, backends
+from src.annotation.dedup import ChunkIndex, QADeduplicator
+from src.annotation.question_filter import filter_questions
+from src.annotation.question_generator import generation_kwargs
+from src.config import (
+    QG_MODEL,
+    QA_MODEL,
+    MIN_ANSWER_SCORE,
+    MIN_ANSWER_LENGTH,
+    QG_BATCH_SIZE,
+    QA_BATCH_SIZE,
+    CACHE_DIR,
+    INFERENCE_CACHE_ENABLED,
+    INFERENCE_CACHE_MAX_MB,
+    DEDUP_ENABLED,
+    DEDUP_QA_PAIRS,
+    INFERENCE_BACKEND,
+    QG_DECODING,
+    QG_PREFILTER
+)
+
+Chunk = namedtuple("Chunk", ["key", "page_number", "source_pdf", "text"])
+
+def _hash(*parts):
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
 
 class QAPipeline:
-    def __init__(self):
-        self.qg = QuestionGenerator()
-        self.qa = AnswerExtractor()
+    def __init__(self, qg_batch_size=QG_BATCH_SIZE, qa_batch_size=QA_BATCH_SIZE,
+                 use_cache=INFERENCE_CACHE_ENABLED, dedup=DEDUP_ENABLED, backend=INFERENCE_BACKEND,
+                 decoding=QG_DECODING, prefilter=QG_PREFILTER):
+        self._qg = None
+        self._qa = None
+        self.backend = backends.resolve(backend)
+        self.qg_batch_size = qg_batch_size
+        self.qa_batch_size = qa_batch_size
+        self.dedup = dedup
+        self.decoding = decoding
+        self.prefilter = prefilter
+        self.stats = {}
+
+        self.qg_cache = None
+        self.qa_cache = None
+        if use_cache:
+            max_bytes = INFERENCE_CACHE_MAX_MB * 1024 * 1024
+            # shared by every pipeline in the process, so a long-lived worker
+            # keeps one connection per cache file
+            self.qg_cache = get_cache(os.path.join(CACHE_DIR, "qg_cache.sqlite"), max_bytes)
+            # answers are cached before filtering, so threshold changes don't invalidate them
+            self.qa_cache = get_cache(os.path.join(CACHE_DIR, "qa_cache.sqlite"), max_bytes)
+
+        # quantized / ONNX models don't give bit-identical outputs, so the
+        # backend is part of the cache keys
+        self._qg_key_prefix = _hash(
+            QG_MODEL, self.backend, json.dumps(generation_kwargs(decoding), sort_keys=True)
+        )
+
+    # Models come from the shared registry on first cache miss, so a fully
+    # cached rerun never loads them and later runs reuse the loaded ones
+    @property
+    def qg(self):
+        if self._qg is None:
+            self._qg = model_registry.get_question_generator(self.backend)
+        return self._qg
+
+    @property
+    def qa(self):
+        if self._qa is None:
+            self._qa = model_registry.get_answer_extractor(self.backend)
+        return self._qa
+
+    def _qg_key(self, context):
+        return _hash(self._qg_key_prefix, context)
+
+    def _qa_key(self, question, context):
+        return _hash(QA_MODEL, self.backend, question, context)
+
+    def _generate_questions(self, contexts):
+        results = [None] * len(contexts)
+        if self.qg_cache is not None:
+            for i, context in enumerate(contexts):
+                results[i] = self.qg_cache.get(self._qg_key(context))
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if not missing:
+            return results
+
+        generated = self._run_qg([contexts[i] for i in missing])
+        for i, questions in zip(missing, generated):
+            results[i] = questions
+            if self.qg_cache is not None and questions:
+                self.qg_cache.put(self._qg_key(contexts[i]), questions)
+        return results
+
+    def _run_qg(self, contexts):
+        try:
+            return self.qg.generate_batch(contexts, self.decoding)
+        except Exception as e:
+            print(f"[WARN] Batched question generation failed ({e}), retrying chunk by chunk")
+            # fall back to one chunk at a time so a bad chunk only drops itself
+            results = []
+            for context in contexts:
+                try:
+                    results.append(self.qg.generate(context, self.decoding))
+                except Exception as e:
+                    print(f"[ERROR] Question generation failed for chunk {context[:40]!r}...: {e}")
+                    results.append([])
+            return results
+
+    def _extract_answers(self, questions, contexts):
+        answers = [None] * len(questions)
+        if self.qa_cache is not None:
+            for i, (question, context) in enumerate(zip(questions, contexts)):
+                cached = self.qa_cache.get(self._qa_key(question, context))
+                if cached is not None:
+                    answers[i] = tuple(cached)
 
-    def process(self, input_path, output_path):
-        with open(input_path, "r") as f:
-            pages = json.load(f)
+        missing = [i for i, a in enumerate(answers) if a is None]
+        if not missing:
+            return answers
+
+        extracted = self._run_qa([questions[i] for i in missing], [contexts[i] for i in missing])
+        for i, result in zip(missing, extracted):
+            answers[i] = result
+            if self.qa_cache is not None and result is not None:
+                self.qa_cache.put(self._qa_key(questions[i], contexts[i]), list(result))
+        return answers
+
+    def _run_qa(self, questions, contexts):
+        try:
+            return self.qa.extract_batch(questions, contexts, batch_size=self.qa_batch_size)
+        except Exception as e:
+            print(f"[WARN] Batched answer extraction failed ({e}), retrying pair by pair")
+            answers = []
+            for question, context in zip(questions, contexts):
+                try:
+                    answers.append(self.qa.extract(question, context))
+                except Exception as e:
+                    print(f"[ERROR] Answer extraction failed for {question!r}: {e}")
+                    answers.append(None)
+            return answers
+
+    def flush_caches(self):
+        """Persists the LRU position of this run's cache hits."""
+        for cache in (self.qg_cache, self.qa_cache):
+            if cache is not None:
+                cache.flush()
+
+    def cache_stats(self):
+        if self.qg_cache is None:
+            return {}
+        return {
+            "questions": self.qg_cache.stats(),
+            "answers": self.qa_cache.stats()
+        }
+
+    def _answer_questions(self, pending):
+        """
+        pending: list of (Chunk, question)
+        Returns (chunk_key, record) for the QA pairs that pass the score/length filters.
+        """
+        if not pending:
+            return []
+
+        questions = [question for _, question in pending]
+        contexts = [chunk.text for chunk, _ in pending]
+
+        cpu_start, start = metrics.cpu_time(), time.perf_counter()
+        answers = self._extract_answers(questions, contexts)
+        metrics.get_recorder().record_batch(
+            "question_answering", start, time.perf_counter(), metrics.cpu_time() - cpu_start,
+            [(chunk.source_pdf, chunk.page_number) for chunk, _ in pending]
+        )
 
         qa_pairs = []
+        for (chunk, question), result in zip(pending, answers):
+            if result is None:
+                continue
+            answer, score = result
+
+            if score >= MIN_ANSWER_SCORE and len(answer.strip()) >= MIN_ANSWER_LENGTH:
+                qa_pairs.append((chunk.key, {
+                    "page_number": chunk.page_number,
+                    "question": question,
+                    "answer": answer,
+                    "score": round(float(score), 4),
+                    "source_pdf": chunk.source_pdf,
+                    "context": chunk.text
+                }))
+        return qa_pairs
+
+    @staticmethod
+    def _load_checkpoint(partial_path, checkpoint_path):
+        """
+        Returns the set of completed chunk keys.
+        Records of chunks that never reached the checkpoint file are dropped,
+        so a crash mid-write can't leave duplicates behind.
+        """
+        completed = set()
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                completed = {line.strip() for line in f if line.strip()}
+
+        if os.path.exists(partial_path):
+            # rewrite the partial file so it holds only checkpointed records
+            tmp_path = partial_path + ".tmp"
+            with open(partial_path, "r", encoding="utf-8") as src, \
+                    open(tmp_path, "w", encoding="utf-8") as dst:
+                for line in src:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from an interrupted run
+                    if entry["chunk_key"] in completed:
+                        dst.write(line if line.endswith("\n") else line + "\n")
+            os.replace(tmp_path, partial_path)
+
+        return completed
+
+    def _count(self, name, n=1):
+        self.stats[name] = self.stats.get(name, 0) + n
+        metrics.get_recorder().count(name, n)
 
-        for page in tqdm(pages, desc="Annotating pages"):
+    def _iter_chunks(self, pages, completed, chunk_index=None, on_resumed=None):
+        """
+        Yields a Chunk for every chunk of every page not yet completed.
+        With a `chunk_index`, chunks that nearly duplicate an earlier one are skipped.
+        `on_resumed(chunk_key)` is called for each completed chunk found again in `pages`.
+        """
+        recorder = metrics.get_recorder()
+
+        for page in pages:
             page_number = page["page_number"]
-            text = page["clean_text"]
+            source_pdf = page.get("source_pdf")
 
-            for chunk in chunk_text(text):
-                try:
-                    questions = self.qg.generate(chunk)
-
-                    for question in questions:
-                        answer, score = self.qa.extract(question, chunk)
-
-                        if score >= MIN_ANSWER_SCORE and len(answer.strip()) >= MIN_ANSWER_LENGTH:
-                            qa_pairs.append({
-                                "page_number": page_number,
-                                "question": question,
-                                "answer": answer,
-                                "context": chunk
-                            })
-                except Exception:
+            with recorder.track("chunking", document=source_pdf, page=page_number) as tracker:
+                texts = chunk_text(page["clean_text"])
+                tracker.items = len(texts)
+
+            for index, text in enumerate(texts):
+                chunk_key = f"{page_number}:{index}:{_hash(source_pdf or '', text)[:16]}"
+                duplicate = chunk_index is not None and chunk_index.is_duplicate(text)
+                if chunk_key in completed:
+                    # still indexed above, so resumed runs skip the same chunks
+                    if on_resumed is not None:
+                        on_resumed(chunk_key)
+                    continue
+                if duplicate:
+                    self._count("duplicate_chunks_skipped")
                     continue
+                yield Chunk(chunk_key, page_number, source_pdf, text)
+
+    def process(self, input_path, output_path, resume=True):
+        """
+        Generates QA pairs for every chunk of the cleaned pages at `input_path`.
+        See process_pages.
+        """
+        return self.process_pages(iter_records(input_path), output_path, resume=resume)
+
+    def process_pages(self, pages, output_path, resume=True):
+        """
+        Generates QA pairs for every chunk of `pages`, any iterable of cleaned
+        page records (e.g. a file being read, or a queue fed by ingestion).
+
+        Pages are chunked and annotated as a stream. Results go to
+        `<output_path>.partial.jsonl` and finished chunks are recorded in
+        `<output_path>.checkpoint` as the run goes; an interrupted run resumes
+        from there. At the end the records are copied to `output_path`
+        (JSONL, compressed JSONL or a JSON array depending on its extension).
+        Checkpointed records are only kept for chunks that appear again in
+        `pages`, so an interrupted run on other input never leaks into this one.
+        Returns the number of QA pairs written.
+        """
+        partial_path = f"{output_path}.partial.jsonl"
+        checkpoint_path = f"{output_path}.checkpoint"
+
+        completed = set()
+        if resume:
+            completed = self._load_checkpoint(partial_path, checkpoint_path)
+        else:
+            for path in (partial_path, checkpoint_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if completed:
+            print(f"[INFO] Resuming: {len(completed)} chunks already done")
+
+        self.stats = {}
+        cache_before = self.cache_stats()
+        chunk_index = ChunkIndex() if self.dedup else None
+        qa_dedup = QADeduplicator() if self.dedup and DEDUP_QA_PAIRS else None
+
+        # dedup keys of the checkpointed records, applied only once their chunk shows up again
+        resumed_keys = {}
+        if qa_dedup is not None and completed and os.path.exists(partial_path):
+            for entry in iter_records(partial_path):
+                resumed_keys.setdefault(entry["chunk_key"], []).append(QADeduplicator.key(entry["record"]))
+
+        resumed = set()
+
+        def on_resumed(chunk_key):
+            resumed.add(chunk_key)
+            if qa_dedup is not None:
+                qa_dedup.seed(resumed_keys.pop(chunk_key, ()))
+
+        # Gather chunks across pages so QG batches are not limited by page size
+        chunks = self._iter_chunks(pages, completed, chunk_index, on_resumed)
+        batches = iter(lambda: list(islice(chunks, self.qg_batch_size)), [])
 
-        with open(output_path, "w") as f:
-            json.dump(qa_pairs, f, indent=2)
+        try:
+            with open(partial_path, "a", encoding="utf-8") as partial_file, \
+                    open(checkpoint_path, "a", encoding="utf-8") as checkpoint_file:
 
-        if len(qa_pairs) == 0:
+                def flush(pending, pending_chunks):
+                    results = self._answer_questions(pending)
+                    if qa_dedup is not None:
+                        kept = [(key, record) for key, record in results if qa_dedup.add(record)]
+                        if len(kept) < len(results):
+                            self._count("duplicate_qa_pairs_dropped", len(results) - len(kept))
+                        results = kept
+
+                    for chunk_key, record in results:
+                        partial_file.write(json.dumps(
+                            {"chunk_key": chunk_key, "record": record}, ensure_ascii=False
+                        ) + "\n")
+                    partial_file.flush()
+
+                    # only mark chunks done once all of their records are on disk
+                    checkpoint_file.write("".join(key + "\n" for key in pending_chunks))
+                    checkpoint_file.flush()
+
+                pending, pending_chunks = [], []
+
+                for batch in tqdm(batches, desc="Annotating chunk batches"):
+                    cpu_start, start = metrics.cpu_time(), time.perf_counter()
+                    questions_per_chunk = self._generate_questions([chunk.text for chunk in batch])
+                    metrics.get_recorder().record_batch(
+                        "question_generation", start, time.perf_counter(), metrics.cpu_time() - cpu_start,
+                        [(chunk.source_pdf, chunk.page_number) for chunk in batch]
+                    )
+
+                    for chunk, questions in zip(batch, questions_per_chunk):
+                        self._count("questions_generated", len(questions))
+                        if self.prefilter:
+                            # don't spend QA time on questions that can't yield a valid pair
+                            questions, rejected = filter_questions(questions, chunk.text)
+                            for reason, n in rejected.items():
+                                self._count(f"questions_dropped_{reason}", n)
+                        for question in questions:
+                            pending.append((chunk, question))
+                        pending_chunks.append(chunk.key)
+
+                    if len(pending) >= self.qa_batch_size:
+                        flush(pending, pending_chunks)
+                        pending, pending_chunks = [], []
+
+                flush(pending, pending_chunks)
+        finally:
+            # also on failure, so a crashed run's hits still count as recent
+            self.flush_caches()
+
+        if len(resumed) < len(completed):
+            print(f"[WARN] Discarding checkpointed results of {len(completed) - len(resumed)} chunks "
+                  f"that are not in this run's input")
+        total = write_records(output_path, (
+            entry["record"] for entry in iter_records(partial_path)
+            if entry["chunk_key"] in resumed or entry["chunk_key"] not in completed
+        ))
+
+        # run finished cleanly, nothing left to resume
+        os.remove(partial_path)
+        os.remove(checkpoint_path)
+
+        if total == 0:
             print("\n⚠️ No valid QA pairs were generated. Try adjusting the thresholds or check the input data.")
-        print(f"\n✅ Generated {len(qa_pairs)} QA pairs")
+        print(f"\n✅ Generated {total} QA pairs")
+
+        if self.dedup:
+            print(
+                f"[INFO] Dedup: {self.stats.get('duplicate_chunks_skipped', 0)} near-duplicate chunks skipped, "
+                f"{self.stats.get('duplicate_qa_pairs_dropped', 0)} duplicate QA pairs dropped"
+            )
+        if self.prefilter:
+            print(
+                f"[INFO] Question pre-filter ({self.decoding}): "
+                f"{self.stats.get('questions_generated', 0)} generated, "
+                f"{self.stats.get('questions_dropped_empty', 0)} empty, "
+                f"{self.stats.get('questions_dropped_duplicate', 0)} duplicate, "
+                f"{self.stats.get('questions_dropped_malformed', 0)} malformed"
+            )
+
+        for name, stats in self.cache_stats().items():
+            # the caches are shared by the whole process, so count this run's lookups only
+            hits = stats["hits"] - cache_before[name]["hits"]
+            misses = stats["misses"] - cache_before[name]["misses"]
+            print(
+                f"[INFO] {name} cache: {hits} hits, {misses} misses, "
+                f"{stats['entries']} entries ({stats['bytes'] / 1e6:.1f} MB)"
+            )
+
+        return total
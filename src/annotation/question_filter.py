@@ -0,0 +1,55 @@
+"""
+question_filter.py
+------------------
+Cheap checks run on generated questions before they are sent to the QA
+model, so it doesn't spend time on questions that can't become a valid
+QA pair.
+"""
+
+import re
+from collections import Counter
+
+from src.annotation.dedup import normalize
+from src.config import MIN_QUESTION_WORDS, MAX_QUESTION_WORDS
+
+_LETTER = re.compile(r"[^\W\d_]")
+_REPEATED_WORD = re.compile(r"\b(\w+)(?:\W+\1\b){2,}", re.IGNORECASE)
+
+
+def rejection_reason(question, context=None):
+    """Returns why `question` should be dropped ("empty", "malformed", ...), or None to keep it."""
+    text = question.strip()
+    if not text or not _LETTER.search(text):
+        return "empty"
+
+    words = normalize(text).split()
+    if len(words) < MIN_QUESTION_WORDS or len(words) > MAX_QUESTION_WORDS:
+        return "malformed"
+    if not text.endswith("?") or text.count("?") > 1:
+        return "malformed"
+    # degenerate decoding: "the the the", or a question that is mostly one word
+    if _REPEATED_WORD.search(text) or len(set(words)) < len(words) / 2:
+        return "malformed"
+    if context is not None and normalize(context) == normalize(text):
+        return "malformed"
+    return None
+
+
+def filter_questions(questions, context=None):
+    """
+    Drops empty, malformed and repeated questions for one chunk.
+    Returns (kept questions in order, Counter of rejection reasons).
+    """
+    kept, seen, rejected = [], set(), Counter()
+    for question in questions:
+        reason = rejection_reason(question, context)
+        if reason is None:
+            key = normalize(question)
+            if key in seen:
+                reason = "duplicate"
+            else:
+                seen.add(key)
+                kept.append(question.strip())
+                continue
+        rejected[reason] += 1
+    return kept, rejected
@@ -1,32 +1,91 @@
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-from src.config import QG_MODEL
+from src.config import QG_MODEL, QG_MAX_INPUT_TOKENS, INFERENCE_BACKEND, QG_DECODING
+from src.annotation import backends
+from src.annotation.text_chunker import QG_PREFIX
+
+NUM_QUESTIONS = 3
+
+# Decoding strategies selectable with QG_DECODING, roughly cheapest first
+DECODING_STRATEGIES = {
+    # one question per chunk, no search
+    "greedy": {
+        "max_length": 64,
+        "num_beams": 1,
+        "do_sample": False,
+        "num_return_sequences": 1
+    },
+    # NUM_QUESTIONS independent samples, no beam search
+    "sampling": {
+        "max_length": 64,
+        "num_beams": 1,
+        "do_sample": True,
+        "top_p": 0.95,
+        "temperature": 0.9,
+        "num_return_sequences": NUM_QUESTIONS
+    },
+    # the NUM_QUESTIONS best beams of a small search
+    "beam": {
+        "max_length": 64,
+        "num_beams": NUM_QUESTIONS,
+        "do_sample": False,
+        "num_return_sequences": NUM_QUESTIONS
+    },
+    # one beam per group, pushed apart so the questions differ
+    "diverse_beam": {
+        "max_length": 64,
+        "num_beams": NUM_QUESTIONS * 2,
+        "num_beam_groups": NUM_QUESTIONS,
+        "diversity_penalty": 1.0,
+        "do_sample": False,
+        "num_return_sequences": NUM_QUESTIONS
+    },
+    # original settings: sampled 5-beam search (most expensive)
+    "beam_sampling": {
+        "max_length": 64,
+        "num_beams": 5,
+        "num_return_sequences": NUM_QUESTIONS,
+        "do_sample": True,
+        "temperature": 0.9
+    }
+}
+
+def generation_kwargs(decoding=QG_DECODING):
+    if decoding not in DECODING_STRATEGIES:
+        raise ValueError(f"Unknown QG decoding {decoding!r}, expected one of {list(DECODING_STRATEGIES)}")
+    return DECODING_STRATEGIES[decoding]
+
 
 class QuestionGenerator:
-    def __init__(self):
-        self.tokenizer = T5Tokenizer.from_pretrained(QG_MODEL)
-        self.model = T5ForConditionalGeneration.from_pretrained(QG_MODEL)
+    def __init__(self, backend=INFERENCE_BACKEND):
+        self.backend = backends.resolve(backend)
+        self.tokenizer, self.model = backends.load_qg_model(QG_MODEL, self.backend)
 
-    def generate(self, context):
-        input_text = "generate question: " + context
+    def generate(self, context, decoding=QG_DECODING):
+        return self.generate_batch([context], decoding)[0]
+
+    def generate_batch(self, contexts, decoding=QG_DECODING):
+        """
+        Generates questions for several chunks in one padded T5 call, using
+        one of DECODING_STRATEGIES. Returns one list of questions per input
+        context, in order.
+        """
+        kwargs = generation_kwargs(decoding)
+        input_texts = [QG_PREFIX + context for context in contexts]
         inputs = self.tokenizer(
-            input_text,
+            input_texts,
             return_tensors="pt",
-            truncation=True
+            padding=True,
+            truncation=True,
+            max_length=QG_MAX_INPUT_TOKENS
         )
 
-        outputs = self.model.generate(
-            **inputs,
-            max_length=64,
-            num_beams=5,
-            num_return_sequences=3,
-            do_sample=True,
-            temperature=0.9
-        )
+        outputs = self.model.generate(**inputs, **kwargs)
 
         # 🔥 Decode ALL questions
-        questions = [
-            self.tokenizer.decode(o, skip_special_tokens=True)
-            for o in outputs
-        ]
+        decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
 
-        return questions
+        # generate() returns num_return_sequences rows per input, back to back
+        per_input = kwargs["num_return_sequences"]
+        return [
+            decoded[i * per_input:(i + 1) * per_input]
+            for i in range(len(contexts))
+        ]
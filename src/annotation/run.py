@@ -4,7 +4,7 @@ def main():
     pipeline = QAPipeline()
     pipeline.process(
         input_path="data/cleaned/cleaned.json",
-        output_path="data/final/qa_dataset.json"
+        output_path="data/final/qa_dataset.jsonl"
     )
 
 if __name__ == "__main__":
@@ -1,25 +1,140 @@
-import nltk
-from nltk.tokenize import sent_tokenize
-from src.config import MAX_WORDS_PER_CHUNK
+import math
+import re
+from functools import lru_cache
+from src.config import (
+    QG_MODEL,
+    MAX_WORDS_PER_CHUNK,
+    CHUNK_BY_TOKENS,
+    QG_MAX_INPUT_TOKENS,
+    NLTK_DATA_DIR
+)
 
-nltk.download("punkt")
+QG_PREFIX = "generate question: "
 
-def chunk_text(text):
-    sentences = sent_tokenize(text)
+_FALLBACK_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+class _RegexSentenceTokenizer:
+    """Used when no punkt data is installed locally."""
+
+    def tokenize(self, text):
+        return [s for s in _FALLBACK_SENTENCE_END.split(text) if s]
+
+@lru_cache(maxsize=None)
+def get_sentence_tokenizer():
+    """
+    Loads the punkt sentence tokenizer once, from local NLTK data only
+    (never downloads). Falls back to a simple regex splitter if it is missing.
+    """
+    import nltk
+
+    if NLTK_DATA_DIR and NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+    try:
+        from nltk.tokenize import PunktTokenizer  # nltk >= 3.9 reads punkt_tab
+    except ImportError:
+        PunktTokenizer = None
+
+    try:
+        if PunktTokenizer is not None:
+            return PunktTokenizer("english")
+        return nltk.data.load("tokenizers/punkt/english.pickle")
+    except LookupError:
+        print("[WARN] NLTK punkt data not found locally; using a regex sentence splitter. "
+              "Install it with: python -m nltk.downloader punkt_tab")
+        return _RegexSentenceTokenizer()
+
+@lru_cache(maxsize=None)
+def _qg_tokenizer():
+    # the same tokenizer QuestionGenerator encodes with, so lengths match
+    from src.annotation.backends import load_qg_tokenizer
+    return load_qg_tokenizer(QG_MODEL)
+
+def _token_lengths(sentences):
+    if not sentences:
+        return []
+    encoded = _qg_tokenizer()(sentences, add_special_tokens=False)["input_ids"]
+    return [len(ids) for ids in encoded]
+
+def _token_budget():
+    # room for the QG prefix and the end-of-sequence token
+    return QG_MAX_INPUT_TOKENS - _token_lengths([QG_PREFIX])[0] - 1
+
+def _split_long_sentence(sentence, length, budget):
+    """
+    Cuts an over-long sentence into runs of words that each fit `budget`.
+    Pieces are re-measured and split again until they fit; a single word
+    longer than the budget is left as it is.
+    """
+    words = sentence.split(" ")
+    if len(words) == 1:
+        return [sentence]
+
+    pieces = max(2, math.ceil(length / budget))
+    size = math.ceil(len(words) / pieces)
+    parts = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+    fitted = []
+    for part, part_length in zip(parts, _token_lengths(parts)):
+        if part_length > budget:
+            fitted.extend(_split_long_sentence(part, part_length, budget))
+        else:
+            fitted.append(part)
+    return fitted
+
+def _pack(sentences, lengths, budget, by_tokens):
     chunks, current_chunk = [], []
-    word_count = 0
+    count = 0
 
-    for sent in sentences:
-        words = sent.split()
-        if word_count + len(words) > MAX_WORDS_PER_CHUNK:
+    for sent, length in zip(sentences, lengths):
+        if by_tokens and length > budget:
+            parts = _split_long_sentence(sent, length, budget)
+            if current_chunk:
+                chunks.append(" ".join(current_chunk))
+                current_chunk, count = [], 0
+            chunks.extend(parts)
+            continue
+
+        if count + length > budget and current_chunk:
             chunks.append(" ".join(current_chunk))
             current_chunk = []
-            word_count = 0
+            count = 0
 
         current_chunk.append(sent)
-        word_count += len(words)
+        count += length
 
     if current_chunk:
         chunks.append(" ".join(current_chunk))
 
     return chunks
+
+def chunk_texts(texts, by_tokens=CHUNK_BY_TOKENS):
+    """
+    Splits many page texts into chunks at once. Returns one list of chunks per text.
+
+    Chunks hold whole sentences up to MAX_WORDS_PER_CHUNK words or, with
+    `by_tokens`, up to the QG model's input limit measured with its own
+    tokenizer, so QuestionGenerator never has to truncate them.
+    """
+    tokenizer = get_sentence_tokenizer()
+    sentences_per_text = [tokenizer.tokenize(text) for text in texts]
+
+    flat = [sent for sentences in sentences_per_text for sent in sentences]
+    if by_tokens:
+        # one tokenizer call for every sentence of every page
+        lengths = _token_lengths(flat)
+        budget = _token_budget()
+    else:
+        # text is already whitespace-normalized, so words = spaces + 1
+        lengths = [sent.count(" ") + 1 for sent in flat]
+        budget = MAX_WORDS_PER_CHUNK
+
+    results, start = [], 0
+    for sentences in sentences_per_text:
+        end = start + len(sentences)
+        results.append(_pack(sentences, lengths[start:end], budget, by_tokens))
+        start = end
+    return results
+
+def chunk_text(text, by_tokens=CHUNK_BY_TOKENS):
+    return chunk_texts([text], by_tokens=by_tokens)[0]
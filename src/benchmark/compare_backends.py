@@ -0,0 +1,186 @@
+"""
+compare_backends.py
+-------------------
+Accuracy vs speed of the inference backends (see src/annotation/backends.py)
+on a fixed sample of chunks. The torch fp32 outputs are the reference:
+
+  - QG: throughput, and how close each backend's questions are to the
+    reference questions (best-match token F1). Questions are decoded with a
+    deterministic strategy (beam search by default): with sampling, small
+    logit differences change the drawn tokens and the F1 mostly measures
+    sampling noise
+  - QA: throughput on the reference questions, and exact match / token F1
+    of the answers against the reference answers
+
+    python -m src.benchmark.compare_backends
+    python -m src.benchmark.compare_backends --input data/cleaned/manual_cleaned.jsonl --limit 64
+
+Backends that aren't installed (ONNX Runtime) are skipped.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+from src.annotation.dedup import normalize
+
+SAMPLE_CONTEXTS = [
+    "Before servicing the pump, disconnect the main power supply and close the inlet valve. "
+    "Wait at least ten minutes for the motor to cool down before removing the housing cover.",
+    "The filter cartridge should be replaced every 500 operating hours or when the pressure "
+    "gauge reads above 2.5 bar. Use only genuine replacement cartridges, part number FC-200.",
+    "If the warning light flashes red, the unit has detected low oil pressure. Stop the engine "
+    "immediately and check the oil level with the dipstick located on the left side of the block.",
+    "The controller supports three operating modes: manual, automatic and eco. In eco mode the "
+    "fan speed is reduced by 30 percent to lower power consumption during the night.",
+    "Tighten the mounting bolts to a torque of 45 Nm in a crosswise pattern. Over-tightening can "
+    "deform the flange and cause leaks at the gasket.",
+    "The battery pack takes approximately four hours to charge fully. A green indicator shows "
+    "that charging is complete; an orange indicator means the pack is still charging.",
+    "Calibrate the temperature sensor once a year using the reference probe supplied with the "
+    "service kit. The allowed deviation is plus or minus 0.5 degrees Celsius.",
+    "Store the device in a dry place between 5 and 40 degrees Celsius. Remove the batteries if "
+    "the device will not be used for more than three months."
+]
+
+
+def token_f1(prediction, reference):
+    pred, ref = normalize(prediction).split(), normalize(reference).split()
+    common = sum((Counter(pred) & Counter(ref)).values())
+    if not pred or not ref or common == 0:
+        return float(pred == ref)
+    precision, recall = common / len(pred), common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _mean(values):
+    values = list(values)
+    return round(sum(values) / len(values), 4) if values else None
+
+
+def load_sample(input_path=None, limit=32):
+    if input_path is None:
+        return list(SAMPLE_CONTEXTS)
+
+    from src.record_io import iter_records
+    from src.annotation.text_chunker import chunk_texts
+
+    pages = [page["clean_text"] for page in iter_records(input_path)]
+    chunks = (chunk for page_chunks in chunk_texts(pages) for chunk in page_chunks)
+    return list(islice(chunks, limit))
+
+
+# decoding strategies that don't sample, so backend differences aren't hidden by noise
+DETERMINISTIC_DECODING = ("beam", "greedy", "diverse_beam")
+
+
+def run_backend(backend, contexts, reference=None, decoding="beam"):
+    """Times QG and QA for one backend. QA answers the reference questions when given."""
+    import torch
+    from src.annotation.question_generator import QuestionGenerator
+    from src.annotation.answer_extractor import AnswerExtractor
+
+    start = time.perf_counter()
+    qg = QuestionGenerator(backend=backend)
+    qa = AnswerExtractor(backend=backend)
+    load_s = time.perf_counter() - start
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    questions = qg.generate_batch(contexts, decoding)
+    qg_s = time.perf_counter() - start
+
+    if reference is None:
+        pairs = [(q, c) for qs, c in zip(questions, contexts) for q in qs if q.strip()]
+    else:
+        pairs = reference["pairs"]
+
+    start = time.perf_counter()
+    answers = qa.extract_batch([q for q, _ in pairs], [c for _, c in pairs])
+    qa_s = time.perf_counter() - start
+
+    return {
+        "backend": qg.backend,
+        "load_s": round(load_s, 3),
+        "qg_s": round(qg_s, 3),
+        "qa_s": round(qa_s, 3),
+        "qg_contexts_per_s": round(len(contexts) / qg_s, 2),
+        "qa_pairs_per_s": round(len(pairs) / qa_s, 2) if pairs else None,
+        "questions": questions,
+        "pairs": pairs,
+        "answers": [answer for answer, _ in answers]
+    }
+
+
+def score_against(result, reference):
+    question_f1 = _mean(
+        max((token_f1(q, ref) for ref in refs), default=0.0)
+        for qs, refs in zip(result["questions"], reference["questions"])
+        for q in qs
+    )
+    answer_em = _mean(
+        float(normalize(a) == normalize(ref)) for a, ref in zip(result["answers"], reference["answers"])
+    )
+    answer_f1 = _mean(token_f1(a, ref) for a, ref in zip(result["answers"], reference["answers"]))
+    return {
+        "question_f1": question_f1,
+        "answer_exact_match": answer_em,
+        "answer_f1": answer_f1,
+        "qg_speedup": round(reference["qg_s"] / result["qg_s"], 2),
+        "qa_speedup": round(reference["qa_s"] / result["qa_s"], 2)
+    }
+
+
+def compare(backends, contexts, decoding="beam"):
+    from src.annotation.backends import onnx_available
+
+    reference = run_backend("torch", contexts, decoding=decoding)
+    rows = []
+    for backend in backends:
+        if backend == "onnx" and not onnx_available():
+            print("[WARN] Skipping onnx: onnxruntime / optimum not installed")
+            continue
+
+        result = reference if backend == "torch" else run_backend(backend, contexts, reference, decoding)
+        summary = {key: result[key] for key in
+                   ("backend", "load_s", "qg_s", "qa_s", "qg_contexts_per_s", "qa_pairs_per_s")}
+        summary.update(score_against(result, reference))
+        rows.append(summary)
+    return rows
+
+
+def main(argv=None):
+    from src.annotation.backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Compare QG/QA inference backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--input", help="cleaned pages to sample chunks from (default: built-in sample)")
+    parser.add_argument("--limit", type=int, default=32, help="chunks taken from --input")
+    parser.add_argument("--decoding", default="beam", choices=DETERMINISTIC_DECODING,
+                        help="QG decoding used for the comparison")
+    parser.add_argument("--output", default="data/benchmarks/backends.json")
+    args = parser.parse_args(argv)
+
+    contexts = load_sample(args.input, args.limit)
+    print(f"[INFO] Comparing backends on {len(contexts)} chunks ({args.decoding} decoding)")
+    rows = compare(args.backends, contexts, args.decoding)
+
+    columns = ("backend", "qg_contexts_per_s", "qa_pairs_per_s", "qg_speedup", "qa_speedup",
+               "question_f1", "answer_exact_match", "answer_f1")
+    print("\n" + "  ".join(f"{c:>18}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{str(row[c]):>18}" for c in columns))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"chunks": len(contexts), "decoding": args.decoding, "backends": rows}, f, indent=2)
+    print(f"\n[INFO] Comparison saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+compare_decoding.py
+-------------------
+Throughput and yield of each QG decoding strategy (QG_DECODING) on a fixed
+sample of chunks: how many questions it generates, how many survive the
+pre-filter, how many become valid QA pairs, and valid pairs per CPU-second.
+
+    python -m src.benchmark.compare_decoding
+    python -m src.benchmark.compare_decoding --strategies greedy beam --input data/cleaned/manual_cleaned.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from src import metrics
+from src.benchmark.compare_backends import load_sample
+from src.config import MIN_ANSWER_SCORE, MIN_ANSWER_LENGTH, INFERENCE_BACKEND
+
+
+def run_strategy(decoding, contexts, backend=INFERENCE_BACKEND, prefilter=True):
+    import torch
+    from src.annotation import model_registry
+    from src.annotation.question_filter import filter_questions
+
+    qg = model_registry.get_question_generator(backend)
+    qa = model_registry.get_answer_extractor(backend)
+
+    torch.manual_seed(0)
+    cpu_start, start = metrics.process_cpu_time(), time.perf_counter()
+    questions_per_chunk = qg.generate_batch(contexts, decoding)
+    qg_s = time.perf_counter() - start
+
+    generated = sum(len(questions) for questions in questions_per_chunk)
+    pairs = []
+    for context, questions in zip(contexts, questions_per_chunk):
+        if prefilter:
+            questions, _ = filter_questions(questions, context)
+        pairs.extend((question, context) for question in questions)
+
+    start = time.perf_counter()
+    answers = qa.extract_batch([q for q, _ in pairs], [c for _, c in pairs])
+    qa_s = time.perf_counter() - start
+    cpu_s = metrics.process_cpu_time() - cpu_start
+
+    valid = sum(
+        1 for answer, score in answers
+        if score >= MIN_ANSWER_SCORE and len(answer.strip()) >= MIN_ANSWER_LENGTH
+    )
+    return {
+        "decoding": decoding,
+        "prefilter": prefilter,
+        "questions": generated,
+        "sent_to_qa": len(pairs),
+        "valid_pairs": valid,
+        "yield": round(valid / generated, 3) if generated else None,
+        "qg_s": round(qg_s, 3),
+        "qa_s": round(qa_s, 3),
+        "cpu_s": round(cpu_s, 3),
+        "qg_contexts_per_s": round(len(contexts) / qg_s, 2),
+        "valid_pairs_per_cpu_s": round(valid / cpu_s, 3) if cpu_s > 0 else None
+    }
+
+
+def main(argv=None):
+    from src.annotation.question_generator import DECODING_STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Compare QG decoding strategies")
+    parser.add_argument("--strategies", nargs="+", default=list(DECODING_STRATEGIES),
+                        choices=list(DECODING_STRATEGIES))
+    parser.add_argument("--input", help="cleaned pages to sample chunks from (default: built-in sample)")
+    parser.add_argument("--limit", type=int, default=32, help="chunks taken from --input")
+    parser.add_argument("--no-prefilter", action="store_true", help="send every question to QA")
+    parser.add_argument("--output", default="data/benchmarks/decoding.json")
+    args = parser.parse_args(argv)
+
+    contexts = load_sample(args.input, args.limit)
+    print(f"[INFO] Comparing decoding strategies on {len(contexts)} chunks")
+
+    # load the models before timing anything
+    from src.annotation import model_registry
+    model_registry.warm_up()
+
+    rows = [run_strategy(s, contexts, prefilter=not args.no_prefilter) for s in args.strategies]
+
+    columns = ("decoding", "questions", "sent_to_qa", "valid_pairs", "yield",
+               "qg_contexts_per_s", "cpu_s", "valid_pairs_per_cpu_s")
+    print("\n" + "  ".join(f"{c:>21}" for c in columns))
+    for row in rows:
+        print("  ".join(f"{str(row[c]):>21}" for c in columns))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"chunks": len(contexts), "strategies": rows}, f, indent=2)
+    print(f"\n[INFO] Comparison saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
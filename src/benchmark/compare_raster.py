@@ -0,0 +1,123 @@
+"""
+compare_raster.py
+-----------------
+OCR throughput and accuracy of the rasterization / preprocessing modes on
+a synthetic sample: body-text pages, large-font slide pages and a blank
+page. Accuracy is word-level F1 against the PDF's own text layer.
+
+    python -m src.benchmark.compare_raster
+    python -m src.benchmark.compare_raster --pages 6 --workers 4
+
+Needs PyMuPDF, poppler and tesseract.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from src import metrics
+from src.benchmark.compare_backends import token_f1
+from src.config import RASTER_DPI, OCR_WORKERS
+
+# mode -> (adaptive DPI, OpenCV preprocessing)
+MODES = {
+    "fixed": (False, False),
+    "fixed+preprocess": (False, True),
+    "adaptive+preprocess": (True, True)
+}
+
+
+def build_sample(path, pages, seed=0):
+    """Body-text pages, slide-like pages (28pt) and one blank page. Returns the path."""
+    import fitz
+    from src.benchmark.synthetic_pdf import generate_pdf
+
+    with tempfile.TemporaryDirectory() as tmp:
+        body = generate_pdf(os.path.join(tmp, "body.pdf"), pages=pages, words_per_page=300, seed=seed)
+        slides = generate_pdf(os.path.join(tmp, "slides.pdf"), pages=pages, words_per_page=40,
+                              font_size=28, seed=seed + 1)
+
+        sample = fitz.open()
+        for part in (body, slides):
+            with fitz.open(part) as doc:
+                sample.insert_pdf(doc)
+        sample.new_page()
+        sample.save(path)
+        sample.close()
+    return path
+
+
+def ground_truth(path):
+    import fitz
+
+    with fitz.open(path) as doc:
+        return [page.get_text("text") for page in doc]
+
+
+def run_mode(pdf_path, truth, adaptive, preprocess_pages, workers):
+    from src.ingestion.pdf_to_images import iter_pdf_pages
+    from src.ingestion.ocr_extraction import iter_ocr_records
+
+    recorder = metrics.reset()
+    start = time.perf_counter()
+    records = list(iter_ocr_records(
+        iter_pdf_pages(pdf_path, adaptive=adaptive),
+        workers=workers,
+        use_cache=False,
+        document="sample",
+        preprocess_pages=preprocess_pages
+    ))
+    total_s = time.perf_counter() - start
+
+    report = recorder.report()
+    ocr = report["stages"].get("ocr", {})
+    pixels = report["counters"].get("ocr_pixels", 0)
+    text_pages = [(r["text"], t) for r, t in zip(records, truth) if t.strip()]
+
+    return {
+        "pages": len(records),
+        "total_s": round(total_s, 3),
+        "pages_per_s": round(len(records) / total_s, 2),
+        "ocr_megapixels": round(pixels / 1e6, 1),
+        "ocr_megapixels_per_s": round(pixels / 1e6 / ocr["elapsed_s"], 2) if ocr.get("elapsed_s") else None,
+        "blank_pages_skipped": report["counters"].get("pages_blank_skipped", 0),
+        "word_f1": round(sum(token_f1(text, t) for text, t in text_pages) / len(text_pages), 4),
+        "stages": {stage: stats["elapsed_s"] for stage, stats in report["stages"].items()}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare rasterization / preprocessing modes for OCR")
+    parser.add_argument("--pages", type=int, default=4, help="pages of each kind (body text, slides)")
+    parser.add_argument("--workers", type=int, default=OCR_WORKERS)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--output", default="data/benchmarks/raster.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="raster_benchmark_") as tmp:
+        pdf_path = build_sample(os.path.join(tmp, "sample.pdf"), args.pages)
+        truth = ground_truth(pdf_path)
+
+        rows = {}
+        for mode in args.modes:
+            adaptive, preprocess_pages = MODES[mode]
+            print(f"[INFO] Running {mode} (fixed DPI {RASTER_DPI})" if not adaptive else f"[INFO] Running {mode}")
+            rows[mode] = run_mode(pdf_path, truth, adaptive, preprocess_pages, args.workers)
+
+    columns = ("pages_per_s", "ocr_megapixels", "ocr_megapixels_per_s", "blank_pages_skipped", "word_f1")
+    print("\n" + f"{'mode':>20}" + "".join(f"{c:>22}" for c in columns))
+    for mode, row in rows.items():
+        print(f"{mode:>20}" + "".join(f"{str(row[c]):>22}" for c in columns))
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"\n[INFO] Comparison saved to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
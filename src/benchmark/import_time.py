@@ -0,0 +1,72 @@
+"""
+import_time.py
+--------------
+Startup budget check. Imports each entry point in a fresh interpreter with
+`python -X importtime` and fails if it takes longer than its budget or
+pulls in a heavy dependency (those must only be imported on first use).
+
+    python -m src.benchmark.import_time
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# module -> cumulative import budget in milliseconds
+BUDGETS_MS = {
+    "src.export.run_full_pipeline": 300,
+    "src.annotation.run": 300,
+    "src.jobs.job_queue": 100
+}
+
+HEAVY_MODULES = ("torch", "transformers", "nltk", "pytesseract", "pdf2image", "fitz", "cv2", "PIL")
+
+
+def measure(module):
+    """Returns (cumulative import time in ms, heavy modules that got imported)."""
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise ImportError(proc.stderr.strip().splitlines()[-1])
+
+    # lines look like: "import time:   self [us] | cumulative | imported package"
+    cumulative_us = None
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, heavy
+
+
+def main():
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        try:
+            elapsed, heavy = measure(module)
+        except ImportError as e:
+            print(f"[ERROR] {module} failed to import: {e}")
+            failures.append(module)
+            continue
+        status = "ok" if elapsed <= budget and not heavy else "FAIL"
+        print(f"[{status}] {module}: {elapsed:.0f} ms (budget {budget} ms)"
+              + (f", eagerly imports {', '.join(heavy)}" if heavy else ""))
+        if status == "FAIL":
+            failures.append(module)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+run_benchmark.py
+----------------
+Reproducible end-to-end benchmark of the PDF -> QA pipeline.
+
+Generates synthetic PDFs, then times process_pdf (rasterize + OCR + clean),
+clean_json, chunk_text and QAPipeline.process inside a scratch directory.
+Stub QG/QA models are used by default so it runs offline. The synthetic
+PDFs are born-digital, so every page is OCR'd unless --text-layer is given
+(which then measures the text-layer fast path instead).
+
+    python -m src.benchmark.run_benchmark --pages 20 --words-per-page 300
+    python -m src.benchmark.run_benchmark --save-baseline
+    python -m src.benchmark.run_benchmark --baseline benchmarks/baseline.json
+
+Exits with status 1 when a throughput metric drops (or peak memory grows)
+by more than --tolerance compared to the baseline.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from src import metrics
+from src.record_io import iter_records
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+
+# metric -> True if higher is better
+COMPARED_METRICS = {
+    "pages_per_s": True,
+    "cleaning_pages_per_s": True,
+    "chunks_per_s": True,
+    "qa_pairs_per_s": True,
+    "peak_rss_mb": False
+}
+
+
+def _rate(count, seconds):
+    return round(count / seconds, 3) if seconds > 0 else None
+
+
+def run_benchmark(pages=10, words_per_page=250, documents=1, seed=0, real_models=False, text_layer=False):
+    from src.benchmark.synthetic_pdf import generate_pdf
+    from src.ingestion.ingestion_pipeline import process_pdf, LocalUpload
+    from src.cleaning.text_cleaner import clean_json
+    from src.annotation.text_chunker import chunk_texts
+    from src.annotation.qa_pipeline import QAPipeline
+    from src.annotation import model_registry
+
+    if not real_models:
+        from src.benchmark.stub_models import StubQuestionGenerator, StubAnswerExtractor
+        model_registry.register("question_generator", StubQuestionGenerator())
+        model_registry.register("answer_extractor", StubAnswerExtractor())
+
+    recorder = metrics.reset()
+    original_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="qa_benchmark_") as workdir:
+        # pipeline paths are relative to the CWD; run in a scratch tree so
+        # caches start cold and real data is never touched
+        os.chdir(workdir)
+        try:
+            for d in ("data/raw", "data/processed", "data/cleaned", "data/final"):
+                os.makedirs(d, exist_ok=True)
+
+            uploads = [
+                LocalUpload(generate_pdf(
+                    f"synthetic_{i}.pdf", pages=pages, words_per_page=words_per_page, seed=seed + i
+                ))
+                for i in range(documents)
+            ]
+
+            start = time.perf_counter()
+            ingestion = process_pdf(uploaded_files=uploads, use_text_layer=text_layer)
+            ingestion_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            clean_json(ingestion["ocr_output"], "data/cleaned/bench_cleaned.jsonl")
+            cleaning_s = time.perf_counter() - start
+            ocr_pages = sum(1 for _ in iter_records(ingestion["ocr_output"]))
+
+            cleaned_pages = list(iter_records(ingestion["cleaned"]))
+            start = time.perf_counter()
+            chunks_per_page = chunk_texts([page["clean_text"] for page in cleaned_pages])
+            chunk_count = sum(len(chunks) for chunks in chunks_per_page)
+            chunking_s = time.perf_counter() - start
+
+            qa_output = "data/final/bench_qa.jsonl"
+            start = time.perf_counter()
+            QAPipeline(use_cache=False).process(ingestion["cleaned"], qa_output, resume=False)
+            qa_s = time.perf_counter() - start
+            qa_pairs = sum(1 for _ in iter_records(qa_output))
+        finally:
+            os.chdir(original_cwd)
+            if not real_models:
+                model_registry.unload()
+
+    total_pages = len(cleaned_pages)
+    return {
+        "config": {
+            "pages": pages,
+            "words_per_page": words_per_page,
+            "documents": documents,
+            "seed": seed,
+            "models": "real" if real_models else "stub",
+            "text_layer": text_layer
+        },
+        "pages": total_pages,
+        "chunks": chunk_count,
+        "qa_pairs": qa_pairs,
+        "ingestion_s": round(ingestion_s, 3),
+        "cleaning_s": round(cleaning_s, 3),
+        "chunking_s": round(chunking_s, 3),
+        "qa_s": round(qa_s, 3),
+        "pages_per_s": _rate(total_pages, ingestion_s),
+        "cleaning_pages_per_s": _rate(ocr_pages, cleaning_s),
+        "chunks_per_s": _rate(chunk_count, chunking_s),
+        "qa_pairs_per_s": _rate(qa_pairs, qa_s),
+        "peak_rss_mb": metrics.peak_rss_mb(),
+        "stages": recorder.report()["stages"]
+    }
+
+
+def compare_to_baseline(result, baseline, tolerance):
+    """Returns a list of human-readable regressions (empty if none)."""
+    if baseline.get("config") != result["config"]:
+        print("[WARN] Baseline was recorded with a different config; comparison may be meaningless")
+
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+
+        change = (new - old) / old
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PDF -> QA pipeline")
+    parser.add_argument("--pages", type=int, default=10, help="pages per synthetic PDF")
+    parser.add_argument("--words-per-page", type=int, default=250)
+    parser.add_argument("--documents", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-models", action="store_true",
+                        help="use the configured QG/QA models instead of offline stubs")
+    parser.add_argument("--text-layer", action="store_true",
+                        help="read pages from the PDF text layer instead of OCR'ing them")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before flagging a regression")
+    parser.add_argument("--output", default="data/benchmarks/latest.json")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        pages=args.pages,
+        words_per_page=args.words_per_page,
+        documents=args.documents,
+        seed=args.seed,
+        real_models=args.real_models,
+        text_layer=args.text_layer
+    )
+
+    print("\n[BENCHMARK]")
+    for key in ("pages", "chunks", "qa_pairs", *COMPARED_METRICS):
+        print(f"  {key:>22}: {result[key]}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"[INFO] Benchmark report saved to {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[INFO] Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"[INFO] No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+
+    regressions = compare_to_baseline(result, baseline, args.tolerance)
+    if regressions:
+        print("[ERROR] Performance regressions vs baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+
+    print("[INFO] No regressions vs baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
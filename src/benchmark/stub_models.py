@@ -0,0 +1,42 @@
+"""
+stub_models.py
+--------------
+Cheap, deterministic stand-ins for QuestionGenerator and AnswerExtractor,
+so the pipeline can be benchmarked offline without downloading models.
+They follow the same interface as the real classes.
+"""
+
+from src.annotation.question_generator import NUM_QUESTIONS
+
+
+class StubQuestionGenerator:
+    def generate(self, context, decoding=None):
+        return self.generate_batch([context], decoding)[0]
+
+    def generate_batch(self, contexts, decoding=None):
+        results = []
+        for context in contexts:
+            words = [w.strip(".,") for w in context.split() if len(w) > 3]
+            results.append([
+                f"What does the manual say about {word}?"
+                for word in words[:NUM_QUESTIONS]
+            ])
+        return results
+
+
+class StubAnswerExtractor:
+    def extract(self, question, context):
+        return self.extract_batch([question], [context])[0]
+
+    def extract_batch(self, questions, contexts, batch_size=None):
+        # answer with the first sentence that mentions the asked-about word
+        answers = []
+        for question, context in zip(questions, contexts):
+            word = question.rstrip("?").split()[-1].lower()
+            answer, score = context.split(".")[0], 0.3
+            for sentence in context.split("."):
+                if word in sentence.lower():
+                    answer, score = sentence.strip(), 0.9
+                    break
+            answers.append((answer, score))
+        return answers
@@ -0,0 +1,49 @@
+"""
+synthetic_pdf.py
+----------------
+Generates reproducible text PDFs for benchmarking, using PyMuPDF.
+The same seed, page count and density always produce the same document.
+"""
+
+import random
+import fitz  # PyMuPDF
+
+VOCABULARY = (
+    "press hold release button switch panel display menu select option setting "
+    "power supply cable battery charge indicator light warning caution device unit "
+    "motor filter valve pressure temperature sensor cover screw bracket install remove "
+    "clean inspect replace check adjust connect disconnect operate maintenance service "
+    "manual procedure step safety user operator system module port signal error code"
+).split()
+
+
+def make_sentence(rng, min_words=6, max_words=18):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def make_page_text(rng, words_per_page):
+    sentences, count = [], 0
+    while count < words_per_page:
+        sentence = make_sentence(rng)
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return " ".join(sentences)
+
+
+def generate_pdf(output_path, pages=10, words_per_page=250, font_size=11, seed=0):
+    """
+    Writes a `pages`-page PDF with roughly `words_per_page` words of text per
+    page to `output_path`. Returns the path.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+
+    for _ in range(pages):
+        page = doc.new_page()  # A4 portrait
+        rect = page.rect + (50, 50, -50, -50)
+        page.insert_textbox(rect, make_page_text(rng, words_per_page), fontsize=font_size)
+
+    doc.save(str(output_path))
+    doc.close()
+    return str(output_path)
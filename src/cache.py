@@ -0,0 +1,186 @@
+"""
+cache.py
+--------
+Small persistent key/value cache backed by SQLite, with size-bounded LRU
+eviction and hit/miss counters. Used to avoid re-running expensive stages
+(OCR, model inference) on inputs we have already seen.
+
+Use get_cache() for a process-wide instance per file: it is shared between
+runs and threads, and flushed and closed when the process exits.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+# last_access updates from hits are written in batches instead of one commit per hit
+_TOUCH_BATCH = 256
+_EVICT_BATCH = 256
+
+
+class SQLiteCache:
+    def __init__(self, path, max_bytes):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+
+        # shared between worker threads, so serialize access ourselves
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        # running byte total, kept by triggers so it stays right with
+        # several processes sharing the file
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM entries"
+        )
+        self._conn.executescript(
+            "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries"
+            " BEGIN UPDATE meta SET total = total + NEW.size WHERE id = 0; END;"
+            "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries"
+            " BEGIN UPDATE meta SET total = total - OLD.size WHERE id = 0; END;"
+            "CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries"
+            " BEGIN UPDATE meta SET total = total + NEW.size - OLD.size WHERE id = 0; END;"
+        )
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        """Returns the cached value for `key`, or `default` on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= _TOUCH_BATCH:
+                self._write_touched()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def _write_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(t, key) for key, t in self._touched.items()]
+            )
+            self._touched = {}
+
+    def put(self, key, value):
+        """Stores a JSON-serialisable value and evicts least recently used entries if over budget."""
+        data = json.dumps(value, ensure_ascii=False)
+
+        with self._lock:
+            # an upsert, not INSERT OR REPLACE: the implicit delete of a
+            # replace doesn't fire the delete trigger
+            self._conn.execute(
+                "INSERT INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                " value = excluded.value, size = excluded.size, last_access = excluded.last_access",
+                (key, data, len(data), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _total(self):
+        return self._conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0]
+
+    def _evict(self):
+        total = self._total()
+        if total <= self.max_bytes:
+            return
+
+        # recent hits decide what is least recently used
+        self._write_touched()
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def flush(self):
+        """Writes buffered last_access updates; call at the end of a run."""
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = self._total()
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path, max_bytes):
+    """Process-wide SQLiteCache for `path`, opened on first use."""
+    key = str(Path(path).resolve())
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = SQLiteCache(path, max_bytes)
+        return _caches[key]
+
+
+@atexit.register
+def close_all():
+    """Flushes and closes every cache opened with get_cache."""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.close()
+        _caches.clear()
@@ -1,11 +1,14 @@
 from pathlib import Path
-import json
+from src.record_io import write_records
 
 
 def get_latest_cleaned_file(cleaned_dir="data/cleaned"):
     cleaned_dir = Path(cleaned_dir)
 
-    cleaned_files = list(cleaned_dir.glob("*_cleaned.json"))
+    cleaned_files = [
+        f for f in cleaned_dir.iterdir()
+        if f.name.endswith(("_cleaned.json", "_cleaned.jsonl", "_cleaned.jsonl.gz", "_cleaned.jsonl.zst"))
+    ] if cleaned_dir.is_dir() else []
 
     if not cleaned_files:
         raise FileNotFoundError(
@@ -19,14 +22,11 @@ def get_latest_cleaned_file(cleaned_dir="data/cleaned"):
 
 
 def save_cleaned_pages(pages, output_path):
-    """Save cleaned pages list to a JSON file at `output_path`.
+    """Save cleaned pages (any iterable, written record by record) to `output_path`.
 
+    The format follows the extension: .jsonl / .jsonl.gz / .jsonl.zst or a .json array.
     Returns the output path as a string.
     """
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(pages, f, ensure_ascii=False, indent=2)
+    write_records(output_path, pages)
 
     return str(output_path)
\ No newline at end of file
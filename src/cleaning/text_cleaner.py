@@ -5,37 +5,80 @@ Cleans OCR-extracted text by removing unwanted symbols, extra spaces,
 and formatting issues.
 """
 
-import json
 import re
-import os
+import unicodedata
+from src import metrics
+from src.record_io import iter_records, RecordWriter
+from src.ingestion.layout import PageLayout
+from src.config import CLEAN_UNICODE, CLEAN_REPAIR_HYPHENATION, CLEAN_MIN_WORD_CONF
 
-def clean_text(text):
-    # Remove weird symbols, multiple spaces, and control chars
-    text = re.sub(r'\s+', ' ', text)  # normalize spaces
-    text = re.sub(r'[^\x00-\x7F]+', '', text)  # remove non-ASCII
-    text = text.strip()
-    return text
+# Compiled once at import; clean_page runs them in a single pass per page
+_HYPHEN_BREAK = re.compile(r"(\w)-[ \t]*\r?\n\s*(\w)")
+_NON_ASCII = re.compile(r"[^\x00-\x7F]+")
 
-def count_words(text):
-    words = clean_text(text).split()
-    return len(words)
+_LIGATURES = {
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi",
+    "\ufb04": "ffl", "\ufb05": "st", "\ufb06": "st"
+}
+# Control characters other than whitespace are dropped; whitespace is
+# normalized by the final split/join
+_CONTROL_CHARS = {
+    c: None for c in list(range(0x00, 0x20)) + list(range(0x7F, 0xA0))
+    if not chr(c).isspace()
+}
+_TRANSLATE = str.maketrans({**_LIGATURES, **_CONTROL_CHARS})
+
+def clean_page(text, unicode_mode=CLEAN_UNICODE, repair_hyphenation=CLEAN_REPAIR_HYPHENATION):
+    """
+    Cleans one page of OCR text and counts its words.
+    Returns (clean_text, word_count).
+    """
+    if repair_hyphenation:
+        text = _HYPHEN_BREAK.sub(r"\1\2", text)
+
+    if unicode_mode == "nfkc":
+        text = unicodedata.normalize("NFKC", text.translate(_TRANSLATE))
+    elif unicode_mode == "ascii":
+        text = _NON_ASCII.sub("", text.translate(_TRANSLATE))
+    else:
+        text = text.translate(_TRANSLATE)
 
-def clean_json(input_path="data/processed/ocr_output.json",
-               output_path="data/cleaned/cleaned_text.json"):
-    with open(input_path, "r") as f:
-        data = json.load(f)
+    # split() also collapses every run of whitespace and trims the ends
+    words = text.split()
+    return " ".join(words), len(words)
 
-    for entry in data:
-        entry["clean_text"] = clean_text(entry["text"])
-        entry["word_count"] = count_words(entry["text"])
+def page_text(page, min_word_conf=CLEAN_MIN_WORD_CONF):
+    """
+    Text of an OCR page record. With `min_word_conf` and a stored layout,
+    the text is rebuilt from the word boxes without the low-confidence words.
+    """
+    if min_word_conf is None or not page.get("layout"):
+        return page["text"]
+    return PageLayout.from_dict(page["layout"]).text(min_conf=min_word_conf)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(data, f, indent=2)
+def clean_pages(texts, **kwargs):
+    """Batch version of clean_page; returns a list of (clean_text, word_count)."""
+    return [clean_page(text, **kwargs) for text in texts]
+
+def clean_text(text):
+    # Remove weird symbols, multiple spaces, and control chars
+    return clean_page(text)[0]
+
+def count_words(text):
+    return clean_page(text)[1]
 
+def clean_json(input_path="data/processed/ocr_output.jsonl",
+               output_path="data/cleaned/cleaned_text.jsonl"):
+    # Pages are cleaned and written one at a time (JSONL or legacy JSON)
     word_count = 0
-    for entry in data:
-        word_count += entry["word_count"]
+    with RecordWriter(output_path) as writer:
+        for entry in iter_records(input_path):
+            with metrics.get_recorder().track(
+                "cleaning", document=entry.get("source_pdf"), page=entry.get("page_number")
+            ):
+                entry["clean_text"], entry["word_count"] = clean_page(page_text(entry))
+            word_count += entry["word_count"]
+            writer.write(entry)
 
     print(f"[INFO] Cleaned text saved to {output_path}")
     print(f"Total word count: {word_count}")
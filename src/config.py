@@ -1,10 +1,98 @@
+import os
+
 # Models
 QG_MODEL = "valhalla/t5-small-qg-prepend"
 QA_MODEL = "deepset/bert-base-cased-squad2"
+WARM_UP_MODELS = True   # load QG/QA models when a job worker starts, not on first run
+INFERENCE_BACKEND = "torch"     # "torch" (fp32), "torch-int8" (dynamic quantization) or "onnx" (needs optimum[onnxruntime])
+ONNX_MODEL_DIR = "data/models/onnx"   # exported ONNX models are kept here
+
+# Cleaning
+CLEAN_UNICODE = "nfkc"          # "nfkc" (normalize, keep accents), "keep", or "ascii" (legacy: drop non-ASCII)
+CLEAN_REPAIR_HYPHENATION = True # join words split across lines by OCR ("main-\ntenance")
+CLEAN_MIN_WORD_CONF = None      # e.g. 40: drop OCR words below this tesseract confidence (0-100)
 
 # Chunking
 MAX_WORDS_PER_CHUNK = 120
+CHUNK_BY_TOKENS = False       # size chunks by QG tokenizer length instead of words
+QG_MAX_INPUT_TOKENS = 512     # T5 input limit; token-aware chunks always fit in it
+NLTK_DATA_DIR = None          # extra local folder holding the punkt tokenizer data
+
+# Question generation
+QG_DECODING = "beam_sampling"   # "greedy", "sampling", "beam", "diverse_beam" or "beam_sampling" (original)
+QG_PREFILTER = True             # drop empty, duplicate and malformed questions before QA
+MIN_QUESTION_WORDS = 3
+MAX_QUESTION_WORDS = 30
+
+# Batching
+QG_BATCH_SIZE = 8    # chunks per T5 generate call
+QA_BATCH_SIZE = 32   # (question, context) pairs per BERT forward pass
 
 # Filtering
 MIN_ANSWER_SCORE = 0.25
 MIN_ANSWER_LENGTH = 3
+
+# Deduplication
+DEDUP_ENABLED = True
+DEDUP_CHUNK_THRESHOLD = 0.85   # skip QG/QA for chunks this similar (Jaccard) to an earlier one
+DEDUP_SHINGLE_SIZE = 5         # words per shingle
+DEDUP_NUM_PERM = 64            # MinHash signature length
+DEDUP_LSH_BANDS = 16           # must divide DEDUP_NUM_PERM
+DEDUP_QA_PAIRS = True          # drop QA pairs with the same normalized question and answer
+
+# Rasterization
+RASTER_DPI = 300
+RASTER_PAGES_PER_CALL = 4   # pages decoded per pdftoppm call; bounds peak memory
+SAVE_PAGE_IMAGES = False    # pages go to OCR in memory; set True to also keep them on disk
+PAGE_IMAGE_FORMAT = "PNG"   # "PNG" (lossless), "WEBP" or "JPEG" (compact)
+RASTER_ADAPTIVE_DPI = False  # pick each page's DPI from its size and text height instead of RASTER_DPI
+RASTER_PROBE_DPI = 50        # low-resolution render used to measure text height
+TARGET_TEXT_HEIGHT_PX = 32   # glyph height tesseract reads best at
+RASTER_MIN_DPI = 150
+RASTER_MAX_DPI = 400
+RASTER_MAX_MEGAPIXELS = 40   # caps the DPI of very large pages
+
+# Page preprocessing (OpenCV, before OCR)
+PREPROCESS_PAGES = True        # also skips OCR for pages without any glyph-sized marks
+PREPROCESS_BINARIZE = True    # Otsu threshold to black and white
+PREPROCESS_DESKEW = True      # straighten pages scanned at a slight angle
+
+# Ingestion
+INGESTION_WORKERS = 4   # PDFs processed concurrently; OCR_WORKERS is shared between them
+USE_TEXT_LAYER = True   # read born-digital pages from the PDF text layer; OCR only scanned pages
+TEXT_LAYER_MAX_IMAGE_COVERAGE = 0.5  # pages this much covered by images are OCR'd even with a text layer
+TEXT_LAYER_MIN_VALID_RATIO = 0.9 # share of letters/digits/punctuation/space; lower means a broken font mapping
+
+# Embedded images (src/ingestion/extract_images.py)
+IMAGE_OUTPUT_DIR = "data/processed/embedded_images"
+IMAGE_MIN_SIZE = 64                 # px; smaller images (bullets, icons, rules) are skipped
+IMAGE_WORKERS = os.cpu_count() or 1
+
+# Pipelining
+PIPELINE_OVERLAP = True     # annotate pages while later pages are still being OCR'd
+PIPELINE_QUEUE_SIZE = 32    # cleaned pages buffered between ingestion and annotation
+
+# OCR
+OCR_WORKERS = os.cpu_count() or 1   # concurrent tesseract processes
+OCR_MAX_RETRIES = 2                 # extra attempts per page before giving up
+TESSERACT_CONFIG = ""               # extra tesseract CLI flags, e.g. "--psm 6"
+OCR_WORD_BOXES = True               # keep word/line boxes and confidences ("layout") in OCR records
+
+# Background jobs (dashboard)
+JOBS_DIR = "data/jobs"
+JOB_CONCURRENCY = 2       # pipeline runs executing at once, across all workers
+JOB_POLL_INTERVAL = 1.0   # seconds between status checks
+
+# Export (src/export/sharded_export.py)
+EXPORT_SHARDS = True          # also write the QA dataset as Parquet/Arrow shards (needs pyarrow)
+EXPORT_FORMAT = "parquet"     # "parquet" or "arrow" (Arrow IPC)
+EXPORT_COMPRESSION = "zstd"
+EXPORT_SHARD_MAX_MB = 256     # uncompressed size per shard before starting a new one
+EXPORT_ROW_GROUP_SIZE = 4096  # rows per row group / record batch (unit of random access)
+
+# Caching
+CACHE_DIR = "data/cache"
+OCR_CACHE_ENABLED = True
+OCR_CACHE_MAX_MB = 256
+INFERENCE_CACHE_ENABLED = True   # memoize generated questions and extracted answers
+INFERENCE_CACHE_MAX_MB = 256     # per cache (questions, answers)
@@ -1,6 +1,8 @@
 import streamlit as st
 import time
+import json
 import os
+import subprocess
 import sys
 from pathlib import Path
 
@@ -9,25 +11,29 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-# Import the pipeline
-try:
-    from src.export.run_full_pipeline import run
-except ImportError:
-    # Fallback for UI testing if backend isn't linked
-    def run(uploaded_file):
-        time.sleep(2) # Simulate work
-        return {
-            "Images_ZIP": "data/final/images.zip",
-            "Annotations_JSON": "data/final/annotations.jsonl",
-            "QA_Dataset_CSV": "data/final/qa_dataset.csv"
-        }
-
-if "start_time" not in st.session_state:
-    st.session_state.start_time = None  
-if "end_time" not in st.session_state:
-    st.session_state.end_time = None
-if "outputs" not in st.session_state:
-    st.session_state.outputs = None
+from src.config import JOBS_DIR, JOB_POLL_INTERVAL
+from src.jobs.job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+
+# Pipeline runs execute in a background worker; the page only submits jobs
+# and polls their status. One worker is started per dashboard server (it
+# also warms up the QG/QA models when WARM_UP_MODELS is set).
+@st.cache_resource
+def start_worker():
+    return subprocess.Popen([sys.executable, "-m", "src.jobs.worker"], cwd=project_root)
+
+def ensure_worker():
+    """Starts the worker, or restarts it if it has exited (queued jobs would never run)."""
+    worker = start_worker()
+    if worker.poll() is not None:
+        print(f"[WARN] Job worker exited with code {worker.returncode}, restarting it")
+        start_worker.clear()
+        worker = start_worker()
+    return worker
+
+job_queue = JobQueue(os.path.join(project_root, JOBS_DIR))
+
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
 
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(
@@ -35,6 +41,8 @@ st.set_page_config(
     layout="wide"
 )
 
+ensure_worker()
+
 # -------------------- CUSTOM CSS --------------------
 st.markdown("""
 <style>
@@ -107,43 +115,36 @@ if run_btn and not files:
     st.error("Please upload at least one PDF document to run the pipeline.")
 
 if files and run_btn:
-    # Initialize timing
-        st.session_state.start_time = time.time()
-        st.session_state.end_time = None
-
-        with st.status("Executing Pipeline", expanded=True):
+    # Identical uploads are deduplicated onto a job that is still queued or running
+    st.session_state.job_id = job_queue.submit([(f.name, f.getvalue()) for f in files])
 
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+job = job_queue.get(st.session_state.job_id) if st.session_state.job_id else None
 
-            def ui_progress(message, percent):
-                status_text.write(message)
-                progress_bar.progress(percent)
+if job is not None and job["status"] in (QUEUED, RUNNING):
+    with st.status("Executing Pipeline", expanded=True):
+        st.progress(job["progress"])
+        st.write(job["message"] or "")
+        st.caption(f"Job {job['id']} · {job['status']}")
 
-            # Run pipeline
-            st.session_state.outputs = run(
-                uploaded_files=files,
-                progress_callback=ui_progress
-            )
+    # poll instead of blocking on the run
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
 
-            # Finish timing
-            st.session_state.end_time = time.time()
+elif job is not None and job["status"] == FAILED:
+    st.error(f"Pipeline failed: {job['error']}")
 
-            # Remove progress UI
-            progress_bar.empty()
-            status_text.empty()
+elif job is not None and job["status"] == DONE:
+        outputs = job["outputs"]
 
-            # Success indicator
-            st.markdown(
-                "<div class='success-tick'>✅ Pipeline completed successfully</div>",
-                unsafe_allow_html=True
-            )
+        # Success indicator
+        st.markdown(
+            "<div class='success-tick'>✅ Pipeline completed successfully</div>",
+            unsafe_allow_html=True
+        )
 
-        time.sleep(1)  # Brief pause before navigating to results
-        
         st.header("Pipeline Results")
 
-        if st.session_state.outputs is None:
+        if outputs is None:
             st.warning("No pipeline run yet.")
         else:
             with st.container(key="analysis_container"):
@@ -151,27 +152,53 @@ if files and run_btn:
                 st.subheader("Execution Summary")
 
                 exec_time = None
-                if st.session_state.start_time and st.session_state.end_time:
-                    exec_time = round(
-                        st.session_state.end_time - st.session_state.start_time, 2
-                    )
+                if job["started"] and job["finished"]:
+                    exec_time = round(job["finished"] - job["started"], 2)
 
                 c1, c2, c3 = st.columns(3)
                 c1.metric("Status", "Completed")
-                c2.metric("Files Generated", len(st.session_state.outputs))
+                c2.metric("Files Generated", len(outputs))
                 c3.metric("Execution Time (s)", exec_time if exec_time else "—")
 
                 st.markdown("</div>", unsafe_allow_html=True)
 
+            metrics_path = outputs.get("metrics")
+            if isinstance(metrics_path, str) and os.path.exists(metrics_path):
+                with open(metrics_path, "r") as f:
+                    report = json.load(f)
+
+                st.subheader("Stage Breakdown")
+                st.caption(f"Peak memory: {report.get('peak_rss_mb', '—')} MB")
+                counters = report.get("counters", {})
+                if counters:
+                    # e.g. pages read from the text layer vs OCR'd, duplicates skipped
+                    st.caption(" · ".join(f"{name.replace('_', ' ').capitalize()}: {n}" for name, n in counters.items()))
+                st.dataframe(
+                    [
+                        {
+                            "Stage": stage.replace("_", " ").title(),
+                            "Wall (s)": stats["wall_s"],
+                            "Elapsed (s)": stats["elapsed_s"],
+                            "CPU (s)": stats["cpu_s"],
+                            "Items": stats["items"],
+                            "Items/s": stats["items_per_s"],
+                            "RSS (MB)": stats.get("rss_mb")
+                        }
+                        for stage, stats in report["stages"].items()
+                    ],
+                    use_container_width=True,
+                    hide_index=True
+                )
+
             st.subheader("Downloads")
             st.caption("Generated datasets and intermediate outputs")
 
-            for key, value in st.session_state.outputs.items():
+            for key, value in outputs.items():
                 if isinstance(value, str):
                     with open(value, "rb") as f:
                         st.download_button(
                             label=f"Download {key.replace('_', ' ').title()}",
                             data=f,
                             file_name=value.split("/")[-1],
-                            mime="application/json"
+                            mime="application/x-ndjson" if ".jsonl" in value else "application/json"
                         )
@@ -1,49 +1,133 @@
-from src.ingestion.ingestion_pipeline import process_pdf
-from src.annotation.pipeline import run_annotation_and_qa
+import os
+import queue
+import threading
+from src import metrics
+from src.ingestion.ingestion_pipeline import process_pdf, iter_ingested_pages, CLEANED_DIR, PROCESSED_DIR
+from src.annotation.pipeline import run_annotation_and_qa, run_annotation_and_qa_on_pages
 from src.cleaning.cleaning_pipeline import get_latest_cleaned_file
+from src.record_io import RecordWriter
+from src.config import PIPELINE_OVERLAP, PIPELINE_QUEUE_SIZE, EXPORT_SHARDS
+
+_DONE = object()
+
+def _run_overlapped(uploaded_files):
+    """
+    Runs ingestion (OCR + cleaning) on a background thread and feeds cleaned
+    pages through a bounded queue into annotation, so QG/QA starts on the
+    first page while the rest of the corpus is still being OCR'd.
+    """
+    cleaned_path = os.path.join(CLEANED_DIR, "combined_cleaned.jsonl")
+    ocr_output_path = os.path.join(PROCESSED_DIR, "ocr_output.jsonl")
+    pages = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(item):
+        # give up if the consumer has gone away, instead of blocking forever
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        try:
+            with RecordWriter(cleaned_path) as writer:
+                for page in iter_ingested_pages(uploaded_files, ocr_output_path=ocr_output_path):
+                    writer.write(page)
+                    put(page)
+                    if stop.is_set():
+                        return
+        except BaseException as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    def consume():
+        while True:
+            item = pages.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    producer = threading.Thread(target=produce, name="ingestion", daemon=True)
+    producer.start()
+    try:
+        qa_outputs = run_annotation_and_qa_on_pages(consume())
+    finally:
+        stop.set()
+        producer.join()
+
+    return {"cleaned": cleaned_path, "ocr_output": ocr_output_path}, qa_outputs
 
 def run(uploaded_files=None, cleaned_json_path=None, progress_callback=None):
     def update(message, percent):
         if progress_callback:
             progress_callback(message, percent)
 
-    update("Starting Annotation and QA Pipeline...", 0)
+    recorder = metrics.reset()
 
-    # Ingestion Step (if uploaded_file is provided)
-    if uploaded_files:
-        update("Running OCR and PDF ingestion", 20)
-        ingestion_outputs = process_pdf(uploaded_files=uploaded_files)
-        cleaned_path = ingestion_outputs["cleaned"]
+    update("Starting Annotation and QA Pipeline...", 0)
 
-    elif cleaned_json_path:
-        ingestion_outputs = {}
-        cleaned_path = cleaned_json_path
-        update("Using provided cleaned JSON", 20)
+    if uploaded_files and PIPELINE_OVERLAP:
+        # Ingestion, cleaning and annotation run concurrently
+        update("Running OCR, cleaning and QA generation concurrently", 20)
+        ingestion_outputs, qa_outputs = _run_overlapped(uploaded_files)
 
     else:
-        ingestion_outputs = {}
-        cleaned_path = get_latest_cleaned_file()
-        update("Using latest cleaned JSON", 20)
+        # Ingestion Step (if uploaded_file is provided)
+        if uploaded_files:
+            update("Running OCR and PDF ingestion", 20)
+            ingestion_outputs = process_pdf(uploaded_files=uploaded_files)
+            cleaned_path = ingestion_outputs["cleaned"]
 
-    update("PDF ingestion and text cleaning completed", 50)
+        elif cleaned_json_path:
+            ingestion_outputs = {}
+            cleaned_path = cleaned_json_path
+            update("Using provided cleaned JSON", 20)
 
-    # Annotation and QA Step
-    update("Running annotation and QA generation", 70)
+        else:
+            ingestion_outputs = {}
+            cleaned_path = get_latest_cleaned_file()
+            update("Using latest cleaned JSON", 20)
 
-    qa_outputs = run_annotation_and_qa(
-        cleaned_json_path=cleaned_path
-    )
+        update("PDF ingestion and text cleaning completed", 50)
+
+        # Annotation and QA Step
+        update("Running annotation and QA generation", 70)
+
+        qa_outputs = run_annotation_and_qa(
+            cleaned_json_path=cleaned_path
+        )
 
-    update("Annotation and QA generation completed", 95)
+    update("Annotation and QA generation completed", 90)
 
     # indicate whether QA outputs were produced
     qa_generated = bool(qa_outputs)
 
+    if EXPORT_SHARDS:
+        update("Exporting Parquet/Arrow shards", 95)
+        try:
+            from src.export.sharded_export import export_shards, default_output_dir
+            qa_outputs["qa_shard_index"] = export_shards(qa_outputs["qa"], default_output_dir(qa_outputs["qa"]))
+        except ImportError:
+            print("[WARN] pyarrow not installed, skipping the sharded export")
+
+    # Per-stage timing/throughput report, saved next to the QA dataset
+    metrics_path = os.path.join(
+        os.path.dirname(qa_outputs["qa"]),
+        os.path.basename(qa_outputs["qa"]).split("_qa.")[0] + "_metrics.json"
+    )
+    recorder.save(metrics_path)
+
     # Completion stage
     update("Finalizing outputs", 100)
 
     return {
         **ingestion_outputs,
         **qa_outputs,
+        "metrics": metrics_path,
         "qa_generated": qa_generated
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,320 @@
+"""
+sharded_export.py
+-----------------
+Exports a QA dataset (JSONL from QAPipeline) as size-bounded, compressed
+Parquet or Arrow IPC shards for training jobs:
+
+    <output_dir>/qa-00000.parquet        question, answer, context_id, context_row, page_number, source_pdf, score
+    <output_dir>/contexts-00000.parquet  context_id, context, page_number, source_pdf
+    <output_dir>/index.json              shards, row counts and row-group offsets
+
+Each context chunk is stored once and referenced by id, instead of being
+repeated for every QA pair generated from it; QA rows carry the context's
+row number, so resolving it is a single row read. Shards are written in row
+groups (Parquet) / record batches (Arrow) of EXPORT_ROW_GROUP_SIZE rows, and
+the index records where each one starts, so ShardedDataset can read any row
+by opening one memory-mapped shard and decoding one row group.
+
+    python -m src.export.sharded_export data/final/combined_qa.jsonl
+
+Needs `pip install pyarrow`.
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import os
+
+from src.record_io import iter_records
+from src.config import (
+    EXPORT_FORMAT,
+    EXPORT_COMPRESSION,
+    EXPORT_SHARD_MAX_MB,
+    EXPORT_ROW_GROUP_SIZE
+)
+
+INDEX_VERSION = 2
+
+QA_COLUMNS = ("question", "answer", "context_id", "context_row", "page_number", "source_pdf", "score")
+CONTEXT_COLUMNS = ("context_id", "context", "page_number", "source_pdf")
+
+
+def _schemas():
+    import pyarrow as pa
+
+    qa = pa.schema([
+        ("question", pa.string()),
+        ("answer", pa.string()),
+        ("context_id", pa.string()),
+        ("context_row", pa.int64()),
+        ("page_number", pa.int32()),
+        ("source_pdf", pa.string()),
+        ("score", pa.float32())
+    ])
+    contexts = pa.schema([
+        ("context_id", pa.string()),
+        ("context", pa.string()),
+        ("page_number", pa.int32()),
+        ("source_pdf", pa.string())
+    ])
+    return qa, contexts
+
+
+def context_id(context):
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+
+
+class _ShardWriter:
+    """Buffers rows into row groups and rolls over to a new shard after max_bytes."""
+
+    def __init__(self, output_dir, prefix, schema, fmt, compression, max_bytes, row_group_size):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.schema = schema
+        self.fmt = fmt
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.row_group_size = row_group_size
+
+        self.shards = []
+        self.total_rows = 0
+        self._writer = None
+        self._sink = None
+        self._columns = {name: [] for name in schema.names}
+        self._buffered = 0
+        self._shard_bytes = 0
+
+    def _open_shard(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        extension = "parquet" if self.fmt == "parquet" else "arrow"
+        path = os.path.join(self.output_dir, f"{self.prefix}-{len(self.shards):05d}.{extension}")
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+
+        self.shards.append({
+            "path": os.path.basename(path),
+            "first_row": self.total_rows,
+            "rows": 0,
+            "row_groups": []  # first row of each row group, relative to the shard
+        })
+
+    def _flush_row_group(self):
+        import pyarrow as pa
+
+        if not self._buffered:
+            return
+        if self._writer is None:
+            self._open_shard()
+
+        batch = pa.record_batch([self._columns[name] for name in self.schema.names], schema=self.schema)
+        if self.fmt == "parquet":
+            self._writer.write_table(pa.Table.from_batches([batch]), row_group_size=self._buffered)
+        else:
+            self._writer.write_batch(batch)
+
+        shard = self.shards[-1]
+        shard["row_groups"].append(shard["rows"])
+        shard["rows"] += self._buffered
+        self.total_rows += self._buffered
+
+        self._columns = {name: [] for name in self.schema.names}
+        self._buffered = 0
+
+        if self._shard_bytes >= self.max_bytes:
+            self._close_shard()
+
+    def _close_shard(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        # reset here, not when the next shard opens: that only happens at its
+        # first flush, after its pending rows have already been counted
+        self._shard_bytes = 0
+
+    def add(self, row, size):
+        """`size` is the row's approximate uncompressed size in bytes."""
+        for name in self.schema.names:
+            self._columns[name].append(row.get(name))
+        self._buffered += 1
+        self._shard_bytes += size
+        if self._buffered >= self.row_group_size or self._shard_bytes >= self.max_bytes:
+            self._flush_row_group()
+
+    def close(self):
+        self._flush_row_group()
+        self._close_shard()
+        return self.shards
+
+
+def export_shards(qa_path, output_dir, fmt=EXPORT_FORMAT, compression=EXPORT_COMPRESSION,
+                  shard_max_mb=EXPORT_SHARD_MAX_MB, row_group_size=EXPORT_ROW_GROUP_SIZE):
+    """
+    Streams the QA pairs at `qa_path` into QA and context shards under
+    `output_dir`. Returns the path of the shard index.
+    """
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown export format {fmt!r}, expected 'parquet' or 'arrow'")
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name in os.listdir(output_dir):
+        # drop shards of a previous export, which may have had more of them
+        if name.startswith(("qa-", "contexts-")):
+            os.remove(os.path.join(output_dir, name))
+
+    qa_schema, context_schema = _schemas()
+    max_bytes = shard_max_mb * 1024 * 1024
+    qa_writer = _ShardWriter(output_dir, "qa", qa_schema, fmt, compression, max_bytes, row_group_size)
+    context_writer = _ShardWriter(output_dir, "contexts", context_schema, fmt, compression, max_bytes, row_group_size)
+
+    context_rows = {}  # context_id -> row in the contexts table
+    for record in iter_records(qa_path):
+        context = record.get("context", "")
+        cid = context_id(context)
+
+        if cid not in context_rows:
+            context_rows[cid] = len(context_rows)
+            context_writer.add({
+                "context_id": cid,
+                "context": context,
+                "page_number": record.get("page_number"),
+                "source_pdf": record.get("source_pdf")
+            }, len(context.encode("utf-8")) + 64)
+
+        qa_writer.add({
+            "question": record["question"],
+            "answer": record["answer"],
+            "context_id": cid,
+            "context_row": context_rows[cid],
+            "page_number": record.get("page_number"),
+            "source_pdf": record.get("source_pdf"),
+            "score": record.get("score")
+        }, len(record["question"].encode("utf-8")) + len(record["answer"].encode("utf-8")) + 64)
+
+    qa_shards, context_shards = qa_writer.close(), context_writer.close()
+    index = {
+        "version": INDEX_VERSION,
+        "format": fmt,
+        "compression": compression,
+        "source": os.path.basename(str(qa_path)),
+        "qa": {"rows": qa_writer.total_rows, "columns": list(QA_COLUMNS), "shards": qa_shards},
+        "contexts": {"rows": context_writer.total_rows, "columns": list(CONTEXT_COLUMNS), "shards": context_shards}
+    }
+
+    index_path = os.path.join(output_dir, "index.json")
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+    print(
+        f"[INFO] Exported {index['qa']['rows']} QA pairs ({len(index['qa']['shards'])} shards) and "
+        f"{index['contexts']['rows']} unique contexts to {output_dir}"
+    )
+    return index_path
+
+
+class _ShardReader:
+    """Random access to the rows of one table (qa or contexts) described in the index."""
+
+    def __init__(self, base_dir, fmt, table):
+        self.base_dir = base_dir
+        self.fmt = fmt
+        self.shards = table["shards"]
+        self.rows = table["rows"]
+        self._first_rows = [shard["first_row"] for shard in self.shards]
+        self._files = {}
+        self._last_group = (None, None)
+
+    def _open(self, shard_index):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if shard_index not in self._files:
+            path = os.path.join(self.base_dir, self.shards[shard_index]["path"])
+            if self.fmt == "parquet":
+                self._files[shard_index] = pq.ParquetFile(path, memory_map=True)
+            else:
+                self._files[shard_index] = pa.ipc.open_file(pa.memory_map(path, "r"))
+        return self._files[shard_index]
+
+    def _row_group(self, shard_index, group):
+        # keep the last decoded group, so sequential reads decode each group once
+        key, data = self._last_group
+        if key != (shard_index, group):
+            source = self._open(shard_index)
+            if self.fmt == "parquet":
+                data = source.read_row_group(group)
+            else:
+                data = source.get_batch(group)
+            self._last_group = ((shard_index, group), data)
+        return data
+
+    def row(self, i):
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        shard_index = bisect.bisect_right(self._first_rows, i) - 1
+        shard = self.shards[shard_index]
+        offset = i - shard["first_row"]
+        group = bisect.bisect_right(shard["row_groups"], offset) - 1
+        data = self._row_group(shard_index, group)
+        return data.slice(offset - shard["row_groups"][group], 1).to_pylist()[0]
+
+
+class ShardedDataset:
+    """
+    Reads an exported dataset by row number, e.g. from a training data loader:
+
+        dataset = ShardedDataset("data/final/combined_shards/index.json")
+        dataset[12345]  # {"question", "answer", "context", "page_number", "source_pdf", "score", ...}
+    """
+
+    def __init__(self, index_path):
+        with open(index_path, "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != INDEX_VERSION:
+            raise ValueError(f"{index_path} is index version {self.index.get('version')}, "
+                             f"expected {INDEX_VERSION}; re-export the dataset")
+        base_dir = os.path.dirname(os.path.abspath(index_path))
+        self.qa = _ShardReader(base_dir, self.index["format"], self.index["qa"])
+        self.contexts = _ShardReader(base_dir, self.index["format"], self.index["contexts"])
+
+    def __len__(self):
+        return self.qa.rows
+
+    def context(self, row):
+        return self.contexts.row(row)["context"]
+
+    def __getitem__(self, i):
+        record = self.qa.row(i)
+        record["context"] = self.context(record["context_row"])
+        return record
+
+
+def default_output_dir(qa_path):
+    base = os.path.basename(str(qa_path)).split(".")[0]
+    return os.path.join(os.path.dirname(str(qa_path)), f"{base}_shards")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a QA dataset as Parquet/Arrow shards")
+    parser.add_argument("qa_path")
+    parser.add_argument("--output-dir", help="default: <qa_path without extension>_shards")
+    parser.add_argument("--format", default=EXPORT_FORMAT, choices=("parquet", "arrow"))
+    parser.add_argument("--compression", default=EXPORT_COMPRESSION)
+    parser.add_argument("--shard-max-mb", type=int, default=EXPORT_SHARD_MAX_MB)
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or default_output_dir(args.qa_path)
+    export_shards(args.qa_path, output_dir, args.format, args.compression, args.shard_max_mb)
+
+
+if __name__ == "__main__":
+    main()
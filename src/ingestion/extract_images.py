@@ -1,43 +1,168 @@
-# STEP 1
-# import libraries
-import fitz  # PyMuPDF
-import io
-from PIL import Image
-
-# STEP 2
-# file path you want to extract images from
-file = "data/raw/manual.pdf"
-
-# open the file
-pdf_file = fitz.open(file)
-
-# STEP 3
-# iterate over PDF pages
-for page_index in range(len(pdf_file)):
-
-    # get the page itself
-    page = pdf_file.load_page(page_index)  # load the page
-    image_list = page.get_images(full=True)  # get images on the page
-
-    # printing number of images found in this page
-    if image_list:
-        print(f"[+] Found a total of {len(image_list)} images on page {page_index}")
-    else:
-        print("[!] No images found on page", page_index)
-    
-    for image_index, img in enumerate(image_list, start=1):
-        # get the XREF of the image
-        xref = img[0]
-
-        # extract the image bytes
-        base_image = pdf_file.extract_image(xref)
-        image_bytes = base_image["image"]
-
-        # get the image extension
-        image_ext = base_image["ext"]
-
-        # save the image
-        image_name = f"image{page_index+1}_{image_index}.{image_ext}"
-        with open(image_name, "wb") as image_file:
-            image_file.write(image_bytes)
-            print(f"[+] Image saved as {image_name}")
\ No newline at end of file
+"""
+extract_images.py
+-----------------
+Extracts the images embedded in PDFs (figures, diagrams, photos) for the
+VLM side of the pipeline, and writes a manifest linking each image to the
+pages it appears on.
+
+Each image is extracted once even if it is repeated across pages (same
+xref) or across documents (same content hash). Images smaller than
+IMAGE_MIN_SIZE pixels on either side (bullets, rules, logos) are skipped.
+Extraction runs in a process pool across pages and documents.
+
+    from src.ingestion.extract_images import extract_images
+    manifest = extract_images(["data/raw/manual.pdf"])
+
+    python -m src.ingestion.extract_images data/raw/manual.pdf
+
+Output: <output_dir>/<content hash>.<ext> and <output_dir>/manifest.jsonl
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src import metrics
+from src.record_io import write_records
+from src.config import IMAGE_OUTPUT_DIR, IMAGE_MIN_SIZE, IMAGE_WORKERS
+
+XREFS_PER_TASK = 32
+
+
+def list_images(pdf_path, min_size=IMAGE_MIN_SIZE):
+    """
+    Maps each image xref in the PDF to the pages (1-based) it appears on.
+    Returns (xref -> {"pages", "width", "height"}, number of small images skipped).
+    Only reads the page resources, no image data is decoded.
+    """
+    import fitz
+
+    images, skipped = {}, 0
+    with fitz.open(str(pdf_path)) as pdf:
+        for page_index in range(len(pdf)):
+            # (xref, smask, width, height, bpc, colorspace, ...)
+            for xref, _, width, height, *_ in pdf.get_page_images(page_index, full=True):
+                if width < min_size or height < min_size:
+                    skipped += 1
+                    continue
+                entry = images.setdefault(xref, {"pages": [], "width": width, "height": height})
+                if page_index + 1 not in entry["pages"]:
+                    entry["pages"].append(page_index + 1)
+    return images, skipped
+
+
+def _extract_xrefs(pdf_path, xrefs, output_dir):
+    """
+    Worker: saves each xref under its content hash and returns
+    (xref, content hash, path, ext, byte size) for each one.
+    """
+    import fitz
+
+    results = []
+    with fitz.open(str(pdf_path)) as pdf:
+        for xref in xrefs:
+            try:
+                image = pdf.extract_image(xref)
+            except Exception as e:
+                print(f"[WARN] Could not extract image xref {xref} from {pdf_path}: {e}")
+                continue
+            if not image or not image.get("image"):
+                continue
+
+            data = image["image"]
+            digest = hashlib.sha256(data).hexdigest()
+            path = os.path.join(output_dir, f"{digest[:24]}.{image['ext']}")
+            if not os.path.exists(path):
+                # another task may be writing the same image; replace is atomic
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            results.append((xref, digest, path, image["ext"], len(data)))
+    return results
+
+
+def extract_images(pdf_paths, output_dir=IMAGE_OUTPUT_DIR, min_size=IMAGE_MIN_SIZE,
+                   workers=IMAGE_WORKERS, manifest_path=None):
+    """
+    Extracts the embedded images of `pdf_paths` into `output_dir` and writes
+    the manifest (one record per unique image, with every page it is on).
+    Returns the manifest records.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, "manifest.jsonl")
+
+    recorder = metrics.get_recorder()
+    documents, tasks = {}, []
+    for pdf_path in pdf_paths:
+        images, skipped = list_images(pdf_path, min_size)
+        documents[pdf_path] = images
+        recorder.count("images_skipped_small", skipped)
+
+        xrefs = sorted(images)
+        for i in range(0, len(xrefs), XREFS_PER_TASK):
+            tasks.append((pdf_path, xrefs[i:i + XREFS_PER_TASK]))
+
+    cpu_start, start = metrics.cpu_time(), time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_extract_xrefs, pdf_path, xrefs, output_dir) for pdf_path, xrefs in tasks]
+        extracted = [(pdf_path, future.result()) for (pdf_path, _), future in zip(tasks, futures)]
+    # the pool's processes are reaped at shutdown, so their CPU is in take_child_cpu
+    recorder.record("image_extraction", start, time.perf_counter(),
+                    metrics.cpu_time() - cpu_start + metrics.take_child_cpu(),
+                    items=sum(len(results) for _, results in extracted))
+
+    # merge by content hash, so identical images from different xrefs / documents share one entry
+    manifest = {}
+    for pdf_path, results in extracted:
+        document = os.path.basename(str(pdf_path))
+        for xref, digest, path, ext, size in results:
+            info = documents[pdf_path][xref]
+            entry = manifest.setdefault(digest, {
+                "image_id": digest[:24],
+                "path": path,
+                "ext": ext,
+                "width": info["width"],
+                "height": info["height"],
+                "bytes": size,
+                "occurrences": []
+            })
+            entry["occurrences"].extend(
+                {"source_pdf": document, "page_number": page, "xref": xref} for page in info["pages"]
+            )
+
+    records = list(manifest.values())
+    write_records(manifest_path, records)
+
+    extracted_count = sum(len(results) for _, results in extracted)
+    recorder.count("images_extracted", len(records))
+    recorder.count("images_duplicate", extracted_count - len(records))
+    print(
+        f"[INFO] Extracted {len(records)} unique images from {len(documents)} documents "
+        f"({extracted_count - len(records)} duplicates merged); manifest saved to {manifest_path}"
+    )
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract embedded images from PDFs")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--output-dir", default=IMAGE_OUTPUT_DIR)
+    parser.add_argument("--min-size", type=int, default=IMAGE_MIN_SIZE,
+                        help="skip images smaller than this many pixels on either side")
+    parser.add_argument("--workers", type=int, default=IMAGE_WORKERS)
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.pdfs if not os.path.exists(path)]
+    if missing:
+        print(f"[ERROR] File not found: {', '.join(missing)}")
+        return
+
+    extract_images(args.pdfs, args.output_dir, args.min_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,235 @@
 import os
-from src.ingestion.pdf_to_images import pdf_to_images
-from src.ingestion.ocr_extraction import extract_text_from_images
-from src.cleaning.cleaning_pipeline import save_cleaned_pages
-from src.cleaning.text_cleaner import clean_text, count_words
+import json
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from src import metrics
+from src.ingestion.pdf_to_images import iter_pdf_pages
+from src.ingestion.ocr_extraction import iter_ocr_records
+from src.ingestion.text_layer import extract_text_layer
+from src.record_io import RecordWriter, iter_records
+from src.cleaning.text_cleaner import clean_page, page_text
+from src.config import SAVE_PAGE_IMAGES, INGESTION_WORKERS, OCR_WORKERS, USE_TEXT_LAYER
 
 RAW_DIR = "data/raw"
+PROCESSED_DIR = "data/processed"
 CLEANED_DIR = "data/cleaned"
 
-os.makedirs(RAW_DIR, exist_ok=True)
-os.makedirs(CLEANED_DIR, exist_ok=True)
+def _iter_page_texts(pdf_path, document, output_dir, ocr_workers, use_text_layer=USE_TEXT_LAYER, cancel=None):
+    """
+    Yields one {"page_number", "image_path", "text", "method"} record per page,
+    in order. Pages with a usable text layer are read directly; the rest are
+    rasterized (lazily, kept in memory) and OCR'd, and also carry the OCR
+    "layout" (word boxes) when OCR_WORD_BOXES is on.
+    """
+    native = extract_text_layer(pdf_path) if use_text_layer else None
+    ocr_pages = None if native is None else [n for n, text in enumerate(native, 1) if text is None]
+
+    ocr_records = iter([])
+    if ocr_pages is None or ocr_pages:
+        ocr_records = iter_ocr_records(
+            iter_pdf_pages(pdf_path, page_numbers=ocr_pages),
+            page_numbers=ocr_pages,
+            workers=ocr_workers,
+            image_output_dir=os.path.join(output_dir, "images") if SAVE_PAGE_IMAGES else None,
+            document=document,
+            cancel=cancel
+        )
+
+    recorder = metrics.get_recorder()
+    if native is None:
+        for record in ocr_records:
+            recorder.count("pages_ocr")
+            yield {**record, "method": "ocr"}
+        return
+
+    print(f"[INFO] {document}: {len(native) - len(ocr_pages)} pages from the text layer, "
+          f"{len(ocr_pages)} pages to OCR")
+    for page_number, text in enumerate(native, 1):
+        if text is None:
+            recorder.count("pages_ocr")
+            yield {**next(ocr_records), "method": "ocr"}
+        else:
+            recorder.count("pages_text_layer")
+            yield {"page_number": page_number, "image_path": None, "text": text.strip(), "method": "text_layer"}
 
-def process_pdf(uploaded_files):
+def ingest_document(pdf_path, document, output_dir, ocr_workers=OCR_WORKERS, on_page=None,
+                    use_text_layer=USE_TEXT_LAYER, cancel=None):
     """
-    Accepts multiple Streamlit UploadedFile objects,
-    produces ONE cleaned JSON file
+    Extracts and cleans the text of one PDF into its own `output_dir`.
+    Page numbers are local to the document. `on_page` is called after each
+    cleaned page has been flushed to disk. With `use_text_layer` off, every
+    page is OCR'd. Once the `cancel` event is set, the document is left
+    unfinished after the current page.
+    Returns (ocr_output_path, cleaned_path).
     """
+    ocr_output_path = os.path.join(output_dir, "ocr_output.jsonl")
+    cleaned_path = os.path.join(output_dir, "cleaned.jsonl")
+
+    with RecordWriter(ocr_output_path) as ocr_writer, RecordWriter(cleaned_path) as writer:
+        for page in _iter_page_texts(pdf_path, document, output_dir, ocr_workers, use_text_layer, cancel):
+            if cancel is not None and cancel.is_set():
+                break
+            ocr_writer.write(page)
+
+            # Create cleaned text
+            with metrics.get_recorder().track("cleaning", document=document, page=page["page_number"]):
+                raw = page["text"]
+                cleaned, word_count = clean_page(page_text(page))
+
+            writer.write({
+                "page_number": page["page_number"],
+                "raw_text": raw,
+                "clean_text": cleaned,
+                "word_count": word_count,
+                "source_pdf": document,
+                "method": page["method"]
+            })
+            if on_page is not None:
+                writer.flush()
+                on_page()
+
+    return ocr_output_path, cleaned_path
+
+class _PageFeed:
+    """Lets a reader follow a document's cleaned.jsonl while it is still being written."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.written = 0
+        self.done = False
+        self.error = None
+
+    def page_written(self):
+        with self._cond:
+            self.written += 1
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def _wait_for(self, count):
+        with self._cond:
+            while self.written < count and not self.done:
+                self._cond.wait()
+            if self.error is not None:
+                raise self.error
+            return self.written >= count
+
+    def follow(self, path):
+        if not self._wait_for(1):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            count = 1
+            while self._wait_for(count):
+                yield json.loads(f.readline())
+                count += 1
+
+class LocalUpload:
+    """A PDF on disk with the Streamlit UploadedFile interface process_pdf expects."""
 
-    all_pages = []
-    page_counter = 1
+    def __init__(self, path, name=None):
+        self.path = Path(path)
+        self.name = name or self.path.name
 
+    def read(self):
+        return self.path.read_bytes()
+
+def _namespace(name, taken):
+    """Per-document output folder name; repeated upload names get a numeric suffix."""
+    stem = os.path.splitext(name)[0]
+    candidate, n = stem, 2
+    while candidate in taken:
+        candidate = f"{stem}_{n}"
+        n += 1
+    taken.add(candidate)
+    return candidate
+
+def iter_ingested_pages(uploaded_files, workers=INGESTION_WORKERS, ocr_output_path=None,
+                        use_text_layer=USE_TEXT_LAYER):
+    """
+    Ingests uploaded PDFs concurrently, each into data/processed/<name>/, and
+    yields cleaned pages with global page numbers as soon as they are ready.
+
+    Pages come out in upload order, so page numbers and source_pdf
+    attribution don't depend on which document finished first. Documents
+    further down the list keep going in the background and spill to their
+    own files until the reader gets to them.
+
+    Closing the generator early (e.g. annotation failed) stops every
+    document after its current page instead of waiting for the rest to be
+    OCR'd.
+    """
+    if ocr_output_path is None:
+        ocr_output_path = os.path.join(PROCESSED_DIR, "ocr_output.jsonl")
+
+    os.makedirs(RAW_DIR, exist_ok=True)
+
+    # Save PDFs to disk (sequentially; upload handles aren't thread-safe)
+    jobs, taken = [], set()
     for uploaded_file in uploaded_files:
-        # Save PDF to disk
-        pdf_path = os.path.join(RAW_DIR, uploaded_file.name)
+        namespace = _namespace(uploaded_file.name, taken)
+        pdf_path = os.path.join(RAW_DIR, namespace + os.path.splitext(uploaded_file.name)[1])
 
         with open(pdf_path, "wb") as f:
             f.write(uploaded_file.read())
 
-        # PDF -> Images
-        images = pdf_to_images(pdf_path)
+        output_dir = os.path.join(PROCESSED_DIR, namespace)
+        jobs.append((pdf_path, uploaded_file.name, output_dir))
 
-        # OCR
-        # ensure OCR output is written to repo data/processed
-        ocr_output_path = os.path.join("data", "processed", "ocr_output.json")
-        ocr_pages = extract_text_from_images(images, ocr_output_path=ocr_output_path)
+    if not jobs:
+        return
 
-        # Merge pages and create cleaned text
-        for page in ocr_pages:
-            raw = page.get("raw_text") or page.get("text", "")
-            cleaned = clean_text(raw)
+    # The heavy lifting runs in pdftoppm/tesseract subprocesses, so threads
+    # are enough; split the OCR workers so the total stays at OCR_WORKERS.
+    workers = max(1, min(workers, len(jobs)))
+    ocr_workers = max(1, OCR_WORKERS // workers)
+    feeds = [_PageFeed() for _ in jobs]
+    cancel = threading.Event()
 
-            all_pages.append({
-                "page_number": page_counter,
-                "raw_text": raw,
-                "clean_text": cleaned,
-                "word_count": count_words(raw),
-                "source_pdf": uploaded_file.name
-            })
-            page_counter += 1
-    # Save cleaned JSO
-    output_path = os.path.join(CLEANED_DIR, "combined_cleaned.json")
-    save_cleaned_pages(all_pages, output_path)
+    def run_job(job, feed):
+        try:
+            ingest_document(*job, ocr_workers=ocr_workers, on_page=feed.page_written,
+                            use_text_layer=use_text_layer, cancel=cancel)
+        except BaseException as e:
+            feed.finish(e)
+            raise
+        feed.finish()
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for job, feed in zip(jobs, feeds):
+            pool.submit(run_job, job, feed)
+
+        page_counter = 1
+        with RecordWriter(ocr_output_path) as ocr_writer:
+            for (_, document, output_dir), feed in zip(jobs, feeds):
+                first_page = page_counter
+                for page in feed.follow(os.path.join(output_dir, "cleaned.jsonl")):
+                    yield {**page, "page_number": page_counter}
+                    page_counter += 1
+
+                # the document is finished, so its OCR output is complete
+                for offset, ocr_page in enumerate(iter_records(os.path.join(output_dir, "ocr_output.jsonl"))):
+                    ocr_writer.write({**ocr_page, "page_number": first_page + offset, "source_pdf": document})
+    finally:
+        cancel.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def process_pdf(uploaded_files, workers=INGESTION_WORKERS, use_text_layer=USE_TEXT_LAYER):
+    """
+    Accepts multiple Streamlit UploadedFile objects,
+    produces ONE cleaned JSONL file (see iter_ingested_pages).
+    """
+    output_path = os.path.join(CLEANED_DIR, "combined_cleaned.jsonl")
+    ocr_output_path = os.path.join(PROCESSED_DIR, "ocr_output.jsonl")
+
+    with RecordWriter(output_path) as writer:
+        for page in iter_ingested_pages(uploaded_files, workers, ocr_output_path, use_text_layer):
+            writer.write(page)
 
     return {
         "cleaned": output_path,
@@ -0,0 +1,123 @@
+"""
+layout.py
+---------
+Word and line boxes of an OCR'd page, from the same tesseract call that
+produces its text (image_to_data), for VLM grounding.
+
+PageLayout keeps one array per column instead of one dict per word, and is
+stored in the page record the same way:
+
+    {"size": [w, h],
+     "words": {"text": [...], "left": [...], "top": [...], "width": [...],
+               "height": [...], "conf": [...], "line": [...]},
+     "lines": {"left": [...], "top": [...], "width": [...], "height": [...],
+               "block": [...], "par": [...]}}
+
+Coordinates are pixels of the image tesseract saw; conf is 0-100 and
+words.line indexes into lines.
+"""
+
+from array import array
+
+_WORD_NUMERIC = ("left", "top", "width", "height", "conf", "line")
+_LINE_NUMERIC = ("left", "top", "width", "height", "block", "par")
+
+
+class PageLayout:
+    def __init__(self, size=(0, 0)):
+        self.size = list(size)
+        self.words = {"text": [], **{name: array("i") for name in _WORD_NUMERIC}}
+        self.lines = {name: array("i") for name in _LINE_NUMERIC}
+
+    @classmethod
+    def from_tesseract(cls, data, size):
+        """Builds the layout from pytesseract.image_to_data(..., output_type=Output.DICT)."""
+        layout = cls(size)
+        line_index = {}
+
+        for i, text in enumerate(data["text"]):
+            text = text.strip()
+            if data["level"][i] != 5 or not text:
+                continue
+
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            if key not in line_index:
+                line_index[key] = len(layout.lines["left"])
+                for name, value in zip(("block", "par"), key[:2]):
+                    layout.lines[name].append(value)
+                for name in ("left", "top", "width", "height"):
+                    layout.lines[name].append(0)
+
+            layout.words["text"].append(text)
+            for name in ("left", "top", "width", "height"):
+                layout.words[name].append(int(data[name][i]))
+            layout.words["conf"].append(max(0, int(round(float(data["conf"][i])))))
+            layout.words["line"].append(line_index[key])
+
+        layout._fit_lines()
+        return layout
+
+    def _fit_lines(self):
+        """Sets each line box to the union of its word boxes."""
+        extents = {}
+        words = self.words
+        for left, top, width, height, line in zip(
+                words["left"], words["top"], words["width"], words["height"], words["line"]):
+            x0, y0, x1, y1 = extents.get(line, (left, top, left + width, top + height))
+            extents[line] = (min(x0, left), min(y0, top), max(x1, left + width), max(y1, top + height))
+
+        for line, (x0, y0, x1, y1) in extents.items():
+            self.lines["left"][line] = x0
+            self.lines["top"][line] = y0
+            self.lines["width"][line] = x1 - x0
+            self.lines["height"][line] = y1 - y0
+
+    def __len__(self):
+        return len(self.words["text"])
+
+    def text(self, min_conf=None):
+        """
+        Page text rebuilt from the words: one line per OCR line and a blank
+        line between paragraphs. With `min_conf`, words below it are dropped.
+        """
+        lines, current, previous = [], [], None
+        for text, conf, line in zip(self.words["text"], self.words["conf"], self.words["line"]):
+            if min_conf is not None and conf < min_conf:
+                continue
+            if previous is not None and line != previous:
+                lines.append((previous, " ".join(current)))
+                current = []
+            current.append(text)
+            previous = line
+        if current:
+            lines.append((previous, " ".join(current)))
+
+        out, previous_par = [], None
+        for line, text in lines:
+            paragraph = (self.lines["block"][line], self.lines["par"][line])
+            if previous_par is not None and paragraph != previous_par:
+                out.append("")
+            out.append(text)
+            previous_par = paragraph
+        return "\n".join(out)
+
+    def mean_conf(self):
+        confs = self.words["conf"]
+        return round(sum(confs) / len(confs), 1) if confs else None
+
+    def to_dict(self):
+        return {
+            "size": self.size,
+            "words": {name: list(values) for name, values in self.words.items()},
+            "lines": {name: list(values) for name, values in self.lines.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        layout = cls(data["size"])
+        layout.words["text"] = list(data["words"]["text"])
+        for name in _WORD_NUMERIC:
+            layout.words[name] = array("i", data["words"][name])
+        for name in _LINE_NUMERIC:
+            layout.lines[name] = array("i", data["lines"][name])
+        return layout
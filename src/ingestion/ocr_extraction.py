@@ -1,10 +1,30 @@
 # src/ingestion/ocr_extraction.py
 import os
-import json
-from pdf2image import convert_from_path
-from PIL import Image
-import pytesseract
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, lru_cache
+from itertools import count
 from pathlib import Path
+from src import metrics
+from src.cache import get_cache
+from src.record_io import RecordWriter
+from src.config import (
+    OCR_WORKERS,
+    OCR_MAX_RETRIES,
+    PAGE_IMAGE_FORMAT,
+    TESSERACT_CONFIG,
+    CACHE_DIR,
+    OCR_CACHE_ENABLED,
+    OCR_CACHE_MAX_MB,
+    PREPROCESS_PAGES,
+    PREPROCESS_BINARIZE,
+    PREPROCESS_DESKEW,
+    OCR_WORD_BOXES
+)
+from src.ingestion.pdf_to_images import iter_pdf_to_images
+from src.ingestion.preprocessing import preprocess
+from src.ingestion.layout import PageLayout
 
 def pdf_to_images(pdf_path, image_output_dir=None):
     pdf_path = Path(pdf_path)
@@ -13,46 +33,273 @@ def pdf_to_images(pdf_path, image_output_dir=None):
     else:
         image_output_dir = Path(image_output_dir)
 
-    image_output_dir.mkdir(parents=True, exist_ok=True)
-
-    pages = convert_from_path(str(pdf_path), dpi=300)
-    image_paths = []
-
-    for i, page in enumerate(pages):
-        image_path = image_output_dir / f"page_{i+1}.jpg"
-        page.save(image_path, "JPEG")
-        image_paths.append(str(image_path))
+    image_paths = list(iter_pdf_to_images(
+        str(pdf_path),
+        str(image_output_dir),
+        name_template="page_{page}.jpg"
+    ))
 
     print(f"[INFO] {len(image_paths)} pages saved in {image_output_dir}")
     return image_paths
 
-def extract_text_from_images(image_paths, ocr_output_path=None):
-    if ocr_output_path is None:
-        ocr_output_path = Path("data/processed/ocr_output.json")
+def get_ocr_cache():
+    """Process-wide OCR result cache, opened on first use."""
+    return get_cache(
+        os.path.join(CACHE_DIR, "ocr_cache.sqlite"),
+        max_bytes=OCR_CACHE_MAX_MB * 1024 * 1024
+    )
+
+@lru_cache(maxsize=None)
+def _tesseract_version():
+    import pytesseract
+
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return "unknown"
+
+def page_cache_key(image, preprocess_pages=PREPROCESS_PAGES):
+    """
+    Content hash of a page plus everything that changes tesseract's output,
+    so identical pages hit the cache regardless of which PDF they came from.
+    """
+    from PIL import Image
+
+    h = hashlib.sha256()
+    preprocessing = f"{PREPROCESS_BINARIZE}:{PREPROCESS_DESKEW}" if preprocess_pages else "none"
+    # v2: entries hold {"text", "layout"} instead of the bare text
+    h.update(f"v2|{_tesseract_version()}|{TESSERACT_CONFIG}|{preprocessing}|".encode())
+
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    elif isinstance(image, Image.Image):
+        h.update(f"{image.mode}|{image.size}|".encode())
+        h.update(image.tobytes())
     else:
-        ocr_output_path = Path(ocr_output_path)
+        h.update(f"{image.dtype}|{image.shape}|".encode())
+        h.update(image.tobytes())
+
+    return h.hexdigest()
+
+def _tesseract_data(image):
+    import pytesseract
 
-    # Ensure directory exists
-    ocr_output_path.parent.mkdir(parents=True, exist_ok=True)
+    data = pytesseract.image_to_data(image, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+    size = (image.shape[1], image.shape[0]) if hasattr(image, "shape") else image.size
+    return PageLayout.from_tesseract(data, size)
 
-    extracted_data = []
-    for i, img_path in enumerate(image_paths):
+def ocr_image_layout(image, retries=OCR_MAX_RETRIES, label=None):
+    """
+    Run tesseract on one page, retrying transient failures, and return
+    (text, PageLayout) from that single pass. Returns ("", None) if every attempt fails.
+    `image` can be a file path, a PIL image or a numpy array; in-memory images
+    are passed to tesseract as-is, without a decode from disk.
+    """
+    from PIL import Image
+
+    last_error = None
+    for _ in range(retries + 1):
         try:
-            text = pytesseract.image_to_string(Image.open(img_path))
+            if isinstance(image, (str, os.PathLike)):
+                with Image.open(image) as img:
+                    layout = _tesseract_data(img)
+            else:
+                layout = _tesseract_data(image)
+            return layout.text(), layout
         except Exception as e:
-            print(f"[ERROR] OCR failed for {img_path}: {e}")
-            text = ""
+            last_error = e
+
+    print(f"[ERROR] OCR failed for {label or image}: {last_error}")
+    return "", None
+
+def ocr_image(image, retries=OCR_MAX_RETRIES, label=None):
+    """Text-only version of ocr_image_layout. Returns "" if every attempt fails."""
+    return ocr_image_layout(image, retries, label)[0]
+
+def save_page_image(image, output_dir, page_number, image_format=PAGE_IMAGE_FORMAT):
+    from PIL import Image
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+
+    image_path = output_dir / f"page_{page_number}.{image_format.lower()}"
+    if image_format.upper() == "WEBP":
+        image.save(image_path, "WEBP", lossless=True)
+    else:
+        image.save(image_path, image_format)
+    return str(image_path)
+
+def _pixels(image):
+    if isinstance(image, (str, os.PathLike)):
+        from PIL import Image
+        with Image.open(image) as img:
+            return img.width * img.height
+    if hasattr(image, "shape"):
+        return image.shape[0] * image.shape[1]
+    return image.width * image.height
+
+def _ocr_page(item, image_output_dir=None, image_format=PAGE_IMAGE_FORMAT, cache=None, document=None,
+              preprocess_pages=PREPROCESS_PAGES):
+    from PIL import Image
+
+    page_number, image = item
+    recorder = metrics.get_recorder()
 
-        extracted_data.append({
-            "page_number": i + 1,
-            "image_path": img_path,
-            "text": text.strip()
-        })
-        print(f"[INFO] Extracted text from page {i+1}")
+    result = None
+    if cache is not None:
+        key = page_cache_key(image, preprocess_pages)
+        result = cache.get(key)
 
-    # Write OCR output
-    with open(ocr_output_path, "w", encoding="utf-8") as f:
-        json.dump(extracted_data, f, indent=2)
+    if result is None:
+        ocr_input = image
+        if preprocess_pages:
+            with recorder.track("preprocessing", document=document, page=page_number):
+                ocr_input = preprocess(image)
+
+        # tesseract runs as a child process of this thread
+        with recorder.track("ocr", document=document, page=page_number, children=True):
+            if ocr_input is None:
+                recorder.count("pages_blank_skipped")
+                text, layout = "", None
+            else:
+                recorder.count("ocr_pixels", _pixels(ocr_input))
+                text, layout = ocr_image_layout(ocr_input, label=f"page {page_number}")
+
+        result = {"text": text, "layout": layout.to_dict() if layout is not None else None}
+        # don't cache failures, so they get retried next run
+        if cache is not None and text:
+            cache.put(key, result)
+
+    if isinstance(image, (str, os.PathLike)):
+        image_path = str(image)
+    elif image_output_dir is not None:
+        image_path = save_page_image(image, image_output_dir, page_number, image_format)
+    else:
+        image_path = None
+
+    # release the decoded page as soon as we are done with it
+    if isinstance(image, Image.Image):
+        image.close()
+
+    return page_number, image_path, result["text"], result["layout"]
+
+def ordered_parallel_map(fn, items, workers):
+    """
+    Like map(fn, items) but runs on a worker pool.
+    Results come back in input order and at most 2 * workers items are in flight,
+    so memory stays bounded even when `items` is a long lazy iterator. If the
+    caller stops early, items that haven't started are cancelled.
+    """
+    if workers <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        in_flight = deque()
+        for item in items:
+            in_flight.append(pool.submit(fn, item))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _until(cancel, items):
+    for item in items:
+        if cancel is not None and cancel.is_set():
+            return
+        yield item
+
+def iter_ocr_records(images, page_numbers=None, workers=OCR_WORKERS,
+                     image_output_dir=None, image_format=PAGE_IMAGE_FORMAT,
+                     use_cache=OCR_CACHE_ENABLED, document=None, preprocess_pages=PREPROCESS_PAGES,
+                     word_boxes=OCR_WORD_BOXES, cancel=None):
+    """
+    OCR a sequence of pages, yielding one record per page in order. `images`
+    may hold file paths or in-memory pages (PIL images / numpy arrays, e.g.
+    from iter_pdf_pages). `page_numbers` gives the page number of each image
+    (default 1, 2, 3, ...). In-memory pages are written to `image_output_dir`
+    only if one is given. Pages already in the OCR cache are not sent to
+    tesseract again. With `preprocess_pages`, pages are cleaned up with
+    OpenCV first and blank pages are not OCR'd at all. With `word_boxes`,
+    records also carry the page "layout" (see src/ingestion/layout.py), taken
+    from the same tesseract pass as the text. Once the `cancel` event is set,
+    no further pages are started.
+    """
+    if page_numbers is None:
+        page_numbers = count(1)
+
+    # Each tesseract call is its own subprocess, so threads are enough to use
+    # every core. Keep tesseract itself single-threaded to avoid oversubscription.
+    if workers > 1:
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+    # images may be a lazy generator (e.g. iter_pdf_pages); pages are
+    # OCR'd as soon as they are rendered instead of after the whole PDF.
+    cache = get_ocr_cache() if use_cache else None
+    if cache is not None:
+        hits_before, misses_before = cache.hits, cache.misses
+
+    results = ordered_parallel_map(
+        partial(
+            _ocr_page,
+            image_output_dir=image_output_dir,
+            image_format=image_format,
+            cache=cache,
+            document=document,
+            preprocess_pages=preprocess_pages
+        ),
+        _until(cancel, zip(page_numbers, images)),
+        workers
+    )
+
+    try:
+        for page_number, img_path, text, layout in results:
+            print(f"[INFO] Extracted text from page {page_number}")
+            record = {
+                "page_number": page_number,
+                "image_path": img_path,
+                "text": text.strip()
+            }
+            if word_boxes:
+                record["layout"] = layout
+            yield record
+    finally:
+        if cache is not None:
+            # keep this run's hits from looking least recently used
+            cache.flush()
+
+    if cache is not None:
+        print(
+            f"[INFO] OCR cache: {cache.hits - hits_before} hits, "
+            f"{cache.misses - misses_before} misses"
+        )
+
+def iter_text_from_images(images, ocr_output_path=None, **kwargs):
+    """
+    iter_ocr_records that also appends each record to `ocr_output_path`
+    as soon as it is ready.
+    """
+    if ocr_output_path is None:
+        ocr_output_path = Path("data/processed/ocr_output.jsonl")
+    else:
+        ocr_output_path = Path(ocr_output_path)
+
+    with RecordWriter(ocr_output_path) as writer:
+        for record in iter_ocr_records(images, **kwargs):
+            writer.write(record)
+            yield record
 
     print(f"[INFO] OCR results saved to {ocr_output_path}")
-    return extracted_data
\ No newline at end of file
+
+def extract_text_from_images(images, ocr_output_path=None, **kwargs):
+    """Eager version of iter_text_from_images; returns the list of page records."""
+    return list(iter_text_from_images(images, ocr_output_path=ocr_output_path, **kwargs))
@@ -2,16 +2,119 @@
 pdf_to_images.py
 ----------------
 Converts all pages of a PDF file into images using pdf2image.
+Pages are rendered a few at a time, so memory use does not grow with
+the length of the document.
 
 Input:  data/raw/<your_pdf_file>.pdf
 Output: data/processed/images/<pdf_name>_page_<n>.jpg
 """
 
 import os
-try:
+import time
+
+from src import metrics
+from src.config import RASTER_DPI, RASTER_PAGES_PER_CALL, RASTER_ADAPTIVE_DPI, RASTER_PROBE_DPI
+
+
+def _page_runs(page_numbers, max_length):
+    """Groups sorted page numbers into (first, last) runs of consecutive pages."""
+    runs = []
+    for page in page_numbers:
+        if runs and page == runs[-1][1] + 1 and page - runs[-1][0] < max_length:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+    return runs
+
+
+def _render(pdf_path, document, first_page, last_page, dpi, stage="rasterization", **kwargs):
     from pdf2image import convert_from_path
-except ImportError:
-    convert_from_path = None
+
+    cpu_start, start = metrics.cpu_time(), time.perf_counter()
+    pages = convert_from_path(
+        str(pdf_path),
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        **kwargs
+    )
+    # pdftoppm runs as a child process of this thread
+    metrics.get_recorder().record_batch(
+        stage, start, time.perf_counter(), metrics.cpu_time() - cpu_start + metrics.take_child_cpu(),
+        [(document, n) for n in range(first_page, last_page + 1)]
+    )
+    return pages
+
+
+def _adaptive_runs(pdf_path, document, first_page, last_page):
+    """
+    Renders a cheap grayscale probe of each page and picks its DPI (see
+    preprocessing.choose_dpi). Returns (first, last, dpi) runs of
+    consecutive pages that share a DPI.
+    """
+    from src.ingestion.preprocessing import choose_dpi
+
+    probes = _render(pdf_path, document, first_page, last_page, RASTER_PROBE_DPI,
+                     stage="dpi_probe", grayscale=True)
+    runs = []
+    for page_number, probe in enumerate(probes, first_page):
+        dpi = choose_dpi(probe, RASTER_PROBE_DPI)
+        probe.close()
+        if runs and runs[-1][2] == dpi:
+            runs[-1][1] = page_number
+        else:
+            runs.append([page_number, page_number, dpi])
+    return runs
+
+
+def iter_pdf_pages(pdf_path, dpi=RASTER_DPI, pages_per_call=RASTER_PAGES_PER_CALL, page_numbers=None,
+                   adaptive=RASTER_ADAPTIVE_DPI):
+    """
+    Lazily renders a PDF, yielding one PIL image per page in order.
+    Only `pages_per_call` pages are decoded at any time. If `page_numbers`
+    (1-based, ascending) is given, only those pages are rendered.
+    With `adaptive`, each page gets its own DPI based on its size and text
+    height instead of `dpi`.
+    """
+    from pdf2image import pdfinfo_from_path
+
+    if page_numbers is None:
+        page_count = pdfinfo_from_path(str(pdf_path))["Pages"]
+        page_numbers = range(1, page_count + 1)
+    document = os.path.basename(str(pdf_path))
+
+    for first_page, last_page in _page_runs(page_numbers, pages_per_call):
+        if adaptive:
+            runs = _adaptive_runs(pdf_path, document, first_page, last_page)
+        else:
+            runs = [(first_page, last_page, dpi)]
+
+        for run_first, run_last, run_dpi in runs:
+            for page in _render(pdf_path, document, run_first, run_last, run_dpi):
+                yield page
+
+
+def iter_pdf_to_images(pdf_path, output_dir="data/processed/images", name_template=None):
+    """
+    Streaming version of pdf_to_images: saves each page as soon as it is
+    rendered and yields its path, so OCR can start on page 1 right away.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    if name_template is None:
+        name_template = pdf_name + "_page_{page}.jpg"
+
+    count = 0
+    for i, page in enumerate(iter_pdf_pages(pdf_path)):
+        image_path = os.path.join(output_dir, name_template.format(page=i + 1))
+        page.save(image_path, "JPEG")
+        page.close()
+        count += 1
+        yield image_path
+
+    print(f"[INFO] Converted {count} pages from {pdf_path} to {output_dir}")
+
 
 def pdf_to_images(pdf_path, output_dir="data/processed/images"):
     """
@@ -22,22 +125,7 @@ def pdf_to_images(pdf_path, output_dir="data/processed/images"):
     Returns:
         list: Paths of generated image files.
     """
-    # Create output directory if not exists
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Convert PDF pages to images
-    pages = convert_from_path(pdf_path, dpi=300)  # 300 DPI = good quality
-    image_paths = []
-
-    # Save each page as an image
-    pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
-    for i, page in enumerate(pages):
-        image_path = os.path.join(output_dir, f"{pdf_name}_page_{i+1}.jpg")
-        page.save(image_path, "JPEG")
-        image_paths.append(image_path)
-
-    print(f"[INFO] Converted {len(pages)} pages from {pdf_path} to {output_dir}")
-    return image_paths
+    return list(iter_pdf_to_images(pdf_path, output_dir))
 
 
 if __name__ == "__main__":
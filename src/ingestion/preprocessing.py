@@ -0,0 +1,160 @@
+"""
+preprocessing.py
+----------------
+Cheap OpenCV steps that make pages faster and easier for tesseract:
+
+  - estimate_text_height: median glyph height, used to pick the render DPI
+  - preprocess: grayscale, Otsu binarization, deskew, and blank-page
+    detection (blank pages skip OCR entirely)
+
+Everything works on a grayscale numpy array; tesseract accepts the result
+directly.
+"""
+
+import os
+
+from src.config import (
+    PREPROCESS_BINARIZE,
+    PREPROCESS_DESKEW,
+    RASTER_MIN_DPI,
+    RASTER_MAX_DPI,
+    RASTER_MAX_MEGAPIXELS,
+    TARGET_TEXT_HEIGHT_PX
+)
+
+# deskew only corrects small scan rotations, and ignores noise-level angles
+_MAX_SKEW_DEGREES = 10
+_MIN_SKEW_DEGREES = 0.3
+# darkest minus lightest pixel below this and the page is blank paper
+_MIN_INK_CONTRAST = 32
+
+
+def to_gray(image):
+    """PIL image, file path or numpy array -> 2-D uint8 numpy array."""
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    if isinstance(image, (str, os.PathLike)):
+        return cv2.imread(str(image), cv2.IMREAD_GRAYSCALE)
+    if isinstance(image, Image.Image):
+        image = np.asarray(image.convert("L"))
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return image
+
+
+def _ink_mask(gray):
+    """Binary mask of dark pixels (text), via Otsu's threshold."""
+    import cv2
+
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    return mask
+
+
+def _glyph_heights(gray):
+    """Heights in pixels of the glyph-sized connected components of the page."""
+    import cv2
+
+    mask = _ink_mask(gray)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    # drop specks, rules, boxes and pictures
+    glyphs = (heights >= 2) & (heights < gray.shape[0] / 4) & (widths < gray.shape[1] / 4) & (areas >= 3)
+    return heights[glyphs]
+
+
+def estimate_text_height(gray):
+    """Median height in pixels of glyph-sized connected components, or None if there is no text."""
+    import numpy as np
+
+    heights = _glyph_heights(gray)
+    if len(heights) < 10:
+        return None
+    return float(np.median(heights))
+
+
+def choose_dpi(probe, probe_dpi):
+    """
+    Picks the render DPI for a page from a low-resolution `probe` render:
+    enough that glyphs come out about TARGET_TEXT_HEIGHT_PX tall, within
+    [RASTER_MIN_DPI, RASTER_MAX_DPI] and RASTER_MAX_MEGAPIXELS.
+    """
+    gray = to_gray(probe)
+    text_height = estimate_text_height(gray)
+
+    if text_height is None:
+        dpi = RASTER_MIN_DPI
+    else:
+        dpi = probe_dpi * TARGET_TEXT_HEIGHT_PX / text_height
+
+    height_in, width_in = gray.shape[0] / probe_dpi, gray.shape[1] / probe_dpi
+    max_dpi_for_pixels = (RASTER_MAX_MEGAPIXELS * 1e6 / (width_in * height_in)) ** 0.5
+
+    dpi = min(dpi, RASTER_MAX_DPI, max_dpi_for_pixels)
+    dpi = max(dpi, RASTER_MIN_DPI)
+    # round so neighbouring pages share a DPI and can be rendered in one call
+    return int(round(dpi / 25.0) * 25)
+
+
+def is_blank(gray):
+    """
+    True if the page has no glyph-sized marks at all. A low ink fraction is
+    not enough: a page holding only a heading or a page number is not blank.
+    """
+    # no contrast at all (std is no good here: a lone page number barely moves it)
+    if int(gray.max()) - int(gray.min()) < _MIN_INK_CONTRAST:
+        return True
+    return len(_glyph_heights(gray)) == 0
+
+
+def _skew_angle(mask):
+    import cv2
+    import numpy as np
+
+    # estimate on a downscaled copy; the angle doesn't need full resolution
+    scale = min(1.0, 1000 / max(mask.shape))
+    if scale < 1.0:
+        mask = cv2.resize(mask, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+
+    coords = np.column_stack(np.nonzero(mask)[::-1]).astype(np.float32)
+    if len(coords) < 50:
+        return 0.0
+    # the reported angle range differs between OpenCV versions; any multiple
+    # of 90 degrees describes the same rectangle, so reduce to (-45, 45]
+    angle = cv2.minAreaRect(coords)[-1] % 90
+    if angle > 45:
+        angle -= 90
+    return angle
+
+
+def deskew(gray):
+    import cv2
+
+    angle = _skew_angle(_ink_mask(gray))
+    if not _MIN_SKEW_DEGREES <= abs(angle) <= _MAX_SKEW_DEGREES:
+        return gray
+
+    h, w = gray.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+def preprocess(image, binarize=PREPROCESS_BINARIZE, straighten=PREPROCESS_DESKEW):
+    """
+    Prepares a page for tesseract. Returns the processed grayscale array,
+    or None if the page is blank and OCR can be skipped.
+    """
+    import cv2
+
+    gray = to_gray(image)
+    if is_blank(gray):
+        return None
+
+    if straighten:
+        gray = deskew(gray)
+    if binarize:
+        _, gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return gray
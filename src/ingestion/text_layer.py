@@ -0,0 +1,77 @@
+"""
+text_layer.py
+-------------
+Reads the embedded text layer of born-digital PDF pages with PyMuPDF, so
+those pages can skip rasterization and OCR entirely. Pages with no usable
+text layer (no text, broken font encodings) or mostly covered by images
+(scans, even with a digital header or footer stamped on) are reported as
+None and go through OCR instead. Short text, e.g. a divider page, is kept.
+"""
+
+import os
+import time
+
+from src import metrics
+from src.config import TEXT_LAYER_MAX_IMAGE_COVERAGE, TEXT_LAYER_MIN_VALID_RATIO
+
+
+def is_usable(text):
+    """True if an extracted text layer is present and looks like real text rather than garbage."""
+    stripped = text.strip()
+    if not stripped:
+        return False
+
+    # fonts without a unicode mapping come out as U+FFFD or private-use glyphs
+    valid = sum(
+        1 for ch in stripped
+        if ch.isalnum() or ch.isspace() or (ch.isprintable() and ch.isascii())
+    )
+    return valid / len(stripped) >= TEXT_LAYER_MIN_VALID_RATIO
+
+
+def image_coverage(page):
+    """Share of the page area covered by images; overlapping images add up, so it is capped at 1."""
+    area = page.rect.width * page.rect.height
+    if area <= 0:
+        return 0.0
+
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = page.rect & info["bbox"]  # clipped to the page
+        if not bbox.is_empty:
+            covered += bbox.width * bbox.height
+    return min(1.0, covered / area)
+
+
+def extract_text_layer(pdf_path):
+    """
+    Returns one entry per page: the text layer if it is usable, else None.
+    Returns None for the whole document if PyMuPDF is not installed or the
+    file can't be parsed, so the caller falls back to OCR for every page.
+    """
+    try:
+        import fitz
+    except ImportError:
+        print("[WARN] PyMuPDF not installed, OCR'ing every page")
+        return None
+
+    document = os.path.basename(str(pdf_path))
+    recorder = metrics.get_recorder()
+
+    try:
+        pdf = fitz.open(str(pdf_path))
+    except Exception as e:
+        print(f"[WARN] Could not read text layer of {document} ({e}), OCR'ing every page")
+        return None
+
+    texts = []
+    with pdf:
+        for index, page in enumerate(pdf):
+            start, cpu_start = time.perf_counter(), metrics.cpu_time()
+            text = page.get_text("text", sort=True)
+            usable = is_usable(text) and image_coverage(page) < TEXT_LAYER_MAX_IMAGE_COVERAGE
+            texts.append(text if usable else None)
+            if usable:
+                recorder.record("text_layer", start, time.perf_counter(), metrics.cpu_time() - cpu_start,
+                                document=document, page=index + 1)
+    return texts
@@ -0,0 +1,177 @@
+"""
+job_queue.py
+------------
+SQLite-backed queue of pipeline runs shared by the dashboard (which submits
+jobs and polls their status) and src.jobs.worker (which executes them).
+
+Identical submissions (same files, same order) are deduplicated onto a
+job that is still queued or running, and at most JOB_CONCURRENCY jobs run at once across all
+workers.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+
+from src.config import JOBS_DIR, JOB_CONCURRENCY
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    def __init__(self, jobs_dir=JOBS_DIR, max_running=JOB_CONCURRENCY):
+        self.jobs_dir = Path(jobs_dir).resolve()
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.max_running = max_running
+
+        self._conn = sqlite3.connect(str(self.jobs_dir / "jobs.sqlite"), timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " digest TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " progress INTEGER NOT NULL DEFAULT 0,"
+            " message TEXT,"
+            " inputs TEXT NOT NULL,"
+            " outputs TEXT,"
+            " error TEXT,"
+            " worker_pid INTEGER,"
+            " created REAL NOT NULL,"
+            " started REAL,"
+            " finished REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_digest ON jobs (digest)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    def submit(self, files):
+        """
+        Queues a run for `files`, a list of (name, bytes). Returns the job id.
+        If the same files are already queued or running, that job's id is
+        returned instead of starting another run. Finished jobs are not
+        reused, so a resubmission picks up changed settings.
+        """
+        digest = hashlib.sha256()
+        for name, data in files:
+            digest.update(name.encode("utf-8") + b"\0" + hashlib.sha256(data).digest())
+        digest = digest.hexdigest()
+
+        existing = self._conn.execute(
+            "SELECT id FROM jobs WHERE digest = ? AND status IN (?, ?) ORDER BY created DESC LIMIT 1",
+            (digest, QUEUED, RUNNING)
+        ).fetchone()
+        if existing is not None:
+            return existing["id"]
+
+        job_id = uuid.uuid4().hex[:12]
+        upload_dir = self.job_dir(job_id) / "uploads"
+        upload_dir.mkdir(parents=True, exist_ok=True)
+
+        inputs = []
+        for i, (name, data) in enumerate(files):
+            # index prefix keeps repeated names apart and preserves order
+            path = upload_dir / f"{i:03d}_{os.path.basename(name)}"
+            path.write_bytes(data)
+            inputs.append({"name": name, "path": str(path)})
+
+        self._conn.execute(
+            "INSERT INTO jobs (id, digest, status, message, inputs, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, digest, QUEUED, "Waiting for a worker", json.dumps(inputs), time.time())
+        )
+        return job_id
+
+    def job_dir(self, job_id):
+        return self.jobs_dir / job_id
+
+    def claim(self, worker_pid):
+        """
+        Atomically moves the oldest queued job to running, unless the global
+        concurrency limit is reached. Returns the job dict or None.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            running = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchone()[0]
+            if running >= self.max_running:
+                self._conn.execute("COMMIT")
+                return None
+
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, worker_pid = ?, started = ?, message = ? WHERE id = ?",
+                (RUNNING, worker_pid, time.time(), "Starting", row["id"])
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def update_progress(self, job_id, percent, message):
+        self._conn.execute(
+            "UPDATE jobs SET progress = ?, message = ? WHERE id = ?", (percent, message, job_id)
+        )
+
+    def finish(self, job_id, outputs):
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, progress = 100, message = ?, outputs = ?, finished = ? WHERE id = ?",
+            (DONE, "Completed", json.dumps(outputs), time.time(), job_id)
+        )
+
+    def fail(self, job_id, error):
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, message = ?, error = ?, finished = ? WHERE id = ?",
+            (FAILED, "Failed", str(error), time.time(), job_id)
+        )
+
+    def recover(self):
+        """Puts running jobs whose worker process has died back in the queue."""
+        rows = self._conn.execute(
+            "SELECT id, worker_pid FROM jobs WHERE status = ?", (RUNNING,)
+        ).fetchall()
+        for row in rows:
+            if row["worker_pid"] is None or not _pid_alive(row["worker_pid"]):
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, worker_pid = NULL, message = ? WHERE id = ?",
+                    (QUEUED, "Requeued after worker exit", row["id"])
+                )
+
+    def get(self, job_id):
+        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["inputs"] = json.loads(job["inputs"])
+        job["outputs"] = json.loads(job["outputs"]) if job["outputs"] else None
+        return job
+
+    def list_jobs(self, limit=20):
+        rows = self._conn.execute(
+            "SELECT id FROM jobs ORDER BY created DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self.get(row["id"]) for row in rows]
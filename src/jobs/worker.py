@@ -0,0 +1,131 @@
+"""
+worker.py
+---------
+Executes queued pipeline jobs. Started automatically by the dashboard, or
+by hand:
+
+    python -m src.jobs.worker
+
+Each job runs in its own child process with data/jobs/<id>/ as the working
+directory, so concurrent jobs never share output files. Child processes
+are reused between jobs, so each one loads the QG/QA models only once.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from src.config import JOB_CONCURRENCY, JOB_POLL_INTERVAL, CACHE_DIR, WARM_UP_MODELS
+from src.jobs.job_queue import JobQueue
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _init_child():
+    if WARM_UP_MODELS:
+        from src.annotation import model_registry
+        model_registry.warm_up()
+
+
+def run_job(job):
+    """Runs one job inside a pool process. Returns its outputs with absolute paths."""
+    from src.export.run_full_pipeline import run
+    from src.ingestion.ingestion_pipeline import LocalUpload
+
+    queue = JobQueue()
+    job_dir = queue.job_dir(job["id"])
+
+    # share the OCR / inference caches between jobs
+    (job_dir / "data").mkdir(parents=True, exist_ok=True)
+    cache_link = job_dir / "data" / "cache"
+    if not cache_link.exists():
+        shared_cache = PROJECT_ROOT / CACHE_DIR
+        shared_cache.mkdir(parents=True, exist_ok=True)
+        cache_link.symlink_to(shared_cache, target_is_directory=True)
+
+    uploads = [LocalUpload(entry["path"], entry["name"]) for entry in job["inputs"]]
+
+    previous_cwd = os.getcwd()
+    os.chdir(job_dir)
+    try:
+        outputs = run(
+            uploaded_files=uploads,
+            progress_callback=lambda message, percent: queue.update_progress(job["id"], percent, message)
+        )
+    finally:
+        os.chdir(previous_cwd)
+
+    return {
+        key: str(job_dir / value) if isinstance(value, str) else value
+        for key, value in outputs.items()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued pipeline jobs")
+    parser.add_argument("--concurrency", type=int, default=JOB_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(max_running=args.concurrency)
+    queue.recover()
+    print(f"[INFO] Job worker {os.getpid()} started with {args.concurrency} slots")
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=args.concurrency, initializer=_init_child)
+
+    def restart(pool, error):
+        # a child died (e.g. killed when out of memory), which breaks the
+        # pool and loses every job running in it
+        for job_id, future in running.items():
+            if future.done() and future.exception() is None:
+                queue.finish(job_id, future.result())
+                print(f"[INFO] Job {job_id} completed")
+            else:
+                queue.fail(job_id, f"Worker process died: {error}")
+                print(f"[ERROR] Job {job_id} failed: worker process died")
+        running.clear()
+        print("[WARN] Restarting the job process pool")
+        pool.shutdown(wait=False, cancel_futures=True)
+        return new_pool()
+
+    running = {}
+    pool = new_pool()
+    try:
+        while True:
+            for job_id, future in list(running.items()):
+                if not future.done():
+                    continue
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    pool = restart(pool, e)
+                    break
+                except Exception as e:
+                    del running[job_id]
+                    queue.fail(job_id, e)
+                    print(f"[ERROR] Job {job_id} failed: {e}")
+                else:
+                    del running[job_id]
+                    queue.finish(job_id, result)
+                    print(f"[INFO] Job {job_id} completed")
+
+            job = queue.claim(os.getpid()) if len(running) < args.concurrency else None
+            if job is None:
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            print(f"[INFO] Starting job {job['id']}")
+            try:
+                running[job["id"]] = pool.submit(run_job, job)
+            except BrokenProcessPool as e:
+                pool = restart(pool, e)
+                running[job["id"]] = pool.submit(run_job, job)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
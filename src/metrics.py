@@ -0,0 +1,245 @@
+"""
+metrics.py
+----------
+Per-stage timing and throughput for a pipeline run (rasterization, OCR,
+cleaning, chunking, question generation, question answering).
+
+Stages record into the process-wide recorder:
+
+    with metrics.get_recorder().track("cleaning", document=name, page=n):
+        ...
+
+and run_full_pipeline saves the report as JSON next to the outputs.
+
+cpu_s is the CPU time of the thread that ran the stage, so stages running
+side by side (OCR threads, concurrent documents, annotation overlapping
+ingestion) don't bill each other. Child process CPU (tesseract, pdftoppm)
+is only added where the child is spawned (see take_child_cpu). Threads a
+library starts on its own, e.g. torch's intra-op pool, are not counted.
+
+rss_mb is the highest resident memory sampled when the stage started and
+ended (process-wide, so concurrent stages see each other); peak_rss_mb at
+the top of the report is the high-water mark of the whole run.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def cpu_time():
+    """CPU seconds used so far by the calling thread."""
+    return time.thread_time()
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return children.ru_utime + children.ru_stime
+
+
+_child_lock = threading.Lock()
+_child_cpu_taken = _children_cpu()
+
+
+def take_child_cpu():
+    """
+    CPU seconds of child processes reaped since the previous call, from any
+    thread. Call it right after a subprocess finishes, at the place that
+    spawned it: each child's CPU is handed out once, so stage totals never
+    double count, though a child reaped by another thread a moment earlier
+    can land in the same call.
+    """
+    global _child_cpu_taken
+    with _child_lock:
+        now = _children_cpu()
+        taken, _child_cpu_taken = now - _child_cpu_taken, now
+    return taken
+
+
+def process_cpu_time():
+    """CPU seconds of the whole process and its finished children; for standalone benchmarks."""
+    return time.process_time() + _children_cpu()
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def current_rss_mb():
+    """Resident memory of the process right now, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+class _Totals:
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.items = 0
+        self.first_start = None
+        self.last_end = None
+
+    def add(self, start, end, cpu, items):
+        self.wall += end - start
+        self.cpu += cpu or 0.0
+        self.items += items
+        self.first_start = start if self.first_start is None else min(self.first_start, start)
+        self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def to_dict(self):
+        # elapsed is the span the stage was active; with a worker pool it is
+        # shorter than the summed wall time, and is what throughput is based on
+        elapsed = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+        return {
+            "wall_s": round(self.wall, 3),
+            "elapsed_s": round(elapsed, 3),
+            "cpu_s": round(self.cpu, 3),
+            "items": self.items,
+            "items_per_s": round(self.items / elapsed, 2) if elapsed > 0 else None
+        }
+
+
+class _Tracker:
+    """Handle yielded by MetricsRecorder.track; set `items` if it isn't known up front."""
+
+    def __init__(self, items):
+        self.items = items
+
+
+class MetricsRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.stages = {}
+        self.documents = {}
+        self.pages = {}
+        self.rss = {}
+        self.counters = {}
+
+    def _sample_rss(self, stage, rss=None):
+        # caller holds the lock
+        samples = [value for value in (self.rss.get(stage), rss, current_rss_mb()) if value is not None]
+        self.rss[stage] = max(samples) if samples else None
+
+    def record(self, stage, start, end, cpu=None, items=1, document=None, page=None, rss=None):
+        """`rss` is an extra RSS sample (MB) taken while the stage ran, e.g. at its start."""
+        with self._lock:
+            self.stages.setdefault(stage, _Totals()).add(start, end, cpu, items)
+            if document is not None:
+                self.documents.setdefault(document, {}).setdefault(stage, _Totals()).add(start, end, cpu, items)
+            if page is not None:
+                self.pages.setdefault((document, page), {}).setdefault(stage, _Totals()).add(start, end, cpu, items)
+            self._sample_rss(stage, rss)
+
+    def record_batch(self, stage, start, end, cpu, keys):
+        """
+        Records one batched call (e.g. a QG batch) that covered several items.
+        `keys` holds a (document, page) pair per item; time is split evenly.
+        """
+        if not keys:
+            return
+        with self._lock:
+            self.stages.setdefault(stage, _Totals()).add(start, end, cpu, len(keys))
+            self._sample_rss(stage)
+
+            share = (end - start) / len(keys)
+            cpu_share = (cpu or 0.0) / len(keys)
+            for i, (document, page) in enumerate(keys):
+                # shares are laid back to back so per-item spans stay inside the batch
+                item_start = start + i * share
+                if document is not None:
+                    self.documents.setdefault(document, {}).setdefault(stage, _Totals()).add(
+                        item_start, item_start + share, cpu_share, 1)
+                if page is not None:
+                    self.pages.setdefault((document, page), {}).setdefault(stage, _Totals()).add(
+                        item_start, item_start + share, cpu_share, 1)
+
+    def count(self, name, n=1):
+        """Adds to a named counter (e.g. chunks skipped as duplicates)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def track(self, stage, items=1, document=None, page=None, children=False):
+        """Records the block's wall and thread CPU time; with `children`, also the CPU of subprocesses it ran."""
+        tracker = _Tracker(items)
+        rss_start = current_rss_mb()
+        cpu_start = cpu_time()
+        start = time.perf_counter()
+        try:
+            yield tracker
+        finally:
+            end = time.perf_counter()
+            cpu_used = cpu_time() - cpu_start
+            if children:
+                cpu_used += take_child_cpu()
+            self.record(stage, start, end, cpu_used, tracker.items, document, page, rss_start)
+
+    def report(self):
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "elapsed_s": round(time.time() - self.started_at, 3),
+                "peak_rss_mb": peak_rss_mb(),
+                "stages": {
+                    stage: {**totals.to_dict(), "rss_mb": self.rss.get(stage)}
+                    for stage, totals in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "documents": {
+                    document: {stage: totals.to_dict() for stage, totals in stages.items()}
+                    for document, stages in self.documents.items()
+                },
+                "pages": [
+                    {
+                        "document": document,
+                        "page_number": page,
+                        "stages": {
+                            stage: {"wall_s": round(t.wall, 4), "cpu_s": round(t.cpu, 4), "items": t.items}
+                            for stage, t in stages.items()
+                        }
+                    }
+                    for (document, page), stages in self.pages.items()
+                ]
+            }
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return str(path)
+
+
+_recorder = MetricsRecorder()
+
+
+def get_recorder():
+    return _recorder
+
+
+def reset():
+    """Starts a fresh recorder (one per pipeline run) and returns it."""
+    global _recorder
+    _recorder = MetricsRecorder()
+    return _recorder
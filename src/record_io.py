@@ -0,0 +1,130 @@
+"""
+record_io.py
+------------
+Record-by-record reading and writing of pipeline data (OCR pages, cleaned
+pages, QA pairs), so no stage has to hold a whole corpus in memory.
+
+The format is picked from the file name:
+    *.jsonl             one JSON object per line
+    *.jsonl.gz          gzip-compressed JSONL
+    *.jsonl.zst         zstd-compressed JSONL (needs the `zstandard` package)
+    *.json              legacy JSON array
+"""
+
+import gzip
+import io
+import itertools
+import json
+from pathlib import Path
+
+
+def _is_jsonl(path):
+    suffixes = Path(path).suffixes
+    return ".jsonl" in suffixes
+
+
+def _open(path, mode):
+    """Opens `path` in text mode, transparently (de)compressing .gz / .zst files."""
+    path = str(path)
+
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading/writing .zst files requires `pip install zstandard`")
+
+        if mode == "r":
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+        return io.TextIOWrapper(stream, encoding="utf-8")
+
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_records(path):
+    """
+    Yields records from `path` one at a time. Legacy JSON arrays are still
+    accepted (they have to be parsed in one go).
+    """
+    with _open(path, "r") as f:
+        lines = f
+        if not _is_jsonl(path):
+            # a .json file may hold an array or, from newer writers, JSONL
+            first = f.read(1)
+            while first and first.isspace():
+                first = f.read(1)
+            if first == "[":
+                for record in json.loads(first + f.read()):
+                    yield record
+                return
+            lines = itertools.chain([first + f.readline()], f)
+
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_records(path):
+    return list(iter_records(path))
+
+
+class RecordWriter:
+    """
+    Writes records to `path` as they are produced.
+
+        with RecordWriter("data/final/doc_qa.jsonl") as writer:
+            for record in records:
+                writer.write(record)
+
+    Paths ending in .json get a JSON array (one record per line, no
+    indentation) so existing consumers keep working.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._array = not _is_jsonl(self.path)
+        self._file = _open(self.path, "w")
+        if self._array:
+            self._file.write("[")
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        if self._array:
+            self._file.write(("\n" if self.count == 0 else ",\n") + line)
+        else:
+            self._file.write(line + "\n")
+        self.count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._array:
+            self._file.write("\n]\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_records(path, records):
+    """Writes an iterable of records to `path`. Returns the number written."""
+    with RecordWriter(path) as writer:
+        writer.write_all(records)
+    return writer.count